@@ -0,0 +1,108 @@
+"""
+batch_simulation.py
+Vectorized open loop simulation of the first order plus dead time process.
+Version: 1.0.2
+"""
+import argparse
+import numpy as np
+from process_engine import FirstOrderProcess
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+BLOCK_SIZE = 256
+
+
+def first_order_filter(data, a, initial=0.0, block_size=BLOCK_SIZE):
+    """
+    Return y with y[k] = a * y[k - 1] + data[k] and y[-1] = initial.
+
+    Without scipy the recursion is evaluated in blocks: every block is solved
+    independently with a lower triangular matrix of powers of `a` and the value
+    carried between blocks is the same recursion on the last sample of each
+    block, with `a ** block_size` as coefficient.
+    """
+    data = np.asarray(data, dtype=float)
+    if len(data) == 0:
+        return data.copy()
+    if lfilter is not None:
+        return lfilter([1.0], [1.0, -a], data, zi=[a * initial])[0]
+
+    size = min(block_size, len(data))
+    lags = np.subtract.outer(np.arange(size), np.arange(size))
+    transfer = np.where(lags >= 0, a ** np.maximum(lags, 0), 0.0)
+    decay = a ** np.arange(1, size + 1)
+
+    blocks = np.zeros((-(-len(data) // size), size))
+    blocks.flat[: len(data)] = data
+    local = blocks @ transfer.T
+    if len(blocks) > 1:
+        ends = first_order_filter(local[:, -1], a**size, initial, block_size)
+        carried = np.concatenate(([initial], ends[:-1]))
+    else:
+        carried = np.array([initial])
+    local += np.outer(carried, decay)
+    return local.ravel()[: len(data)]
+
+
+def simulate_open_loop(inputs, process=None, noise=0.0):
+    """
+    Return the (system, output) response of `process` to the whole `inputs` array.
+
+    The result matches stepping a ProcessSimulation sample by sample in manual
+    mode: the process starts at rest, so the input applied at sample 0 never
+    reaches the output.
+    """
+    if process is None:
+        process = FirstOrderProcess()
+    inputs = np.asarray(inputs, dtype=float)
+    n_value = process.n_value
+
+    applied = inputs.copy()
+    applied[:1] = 0.0
+    forcing = np.zeros(len(inputs))
+    forcing[n_value:] += process.b1 * applied[: max(len(inputs) - n_value, 0)]
+    forcing[n_value + 1 :] += process.b2 * applied[: max(len(inputs) - n_value - 1, 0)]
+
+    system_data = first_order_filter(forcing, process.a1)
+    output_data = system_data + noise
+    return system_data, output_data
+
+
+def load_inputs(path):
+    if path.endswith(".npy"):
+        return np.load(path)
+    return np.loadtxt(path, usecols=0, ndmin=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate the open loop response to a whole input file."
+    )
+    parser.add_argument("input", help=".txt column of inputs or .npy array")
+    parser.add_argument("--gain", type=float, default=1.0)
+    parser.add_argument("--tau", type=float, default=3.34)
+    parser.add_argument("--theta-prime", type=float, default=1.46)
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument(
+        "--output",
+        default="response.npy",
+        help="columns time, input, system and output (.npy, otherwise text)",
+    )
+    args = parser.parse_args(argv)
+
+    process = FirstOrderProcess(args.gain, args.tau, args.theta_prime, args.period)
+    inputs = load_inputs(args.input)
+    system_data, output_data = simulate_open_loop(inputs, process, args.noise)
+    result = np.column_stack((np.arange(len(inputs)), inputs, system_data, output_data))
+    if args.output.endswith(".npy"):
+        np.save(args.output, result)
+    else:
+        np.savetxt(args.output, result, header="time input system output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+bench_ingestion.py
+Throughput of reading large input files and of recording runs to disk.
+Version: 1.0.2
+"""
+import os
+import argparse
+import tempfile
+import bench_utils
+import numpy as np
+from batch_simulation import load_inputs
+from input_sources import open_input_source
+from process_engine import ProcessSimulation
+from run_recorder import RunRecorder, load_run
+
+
+def write_inputs(directory, samples, seed=0):
+    """Write the same random inputs as text, .npy, .bin and a recorded run."""
+    values = np.random.default_rng(seed).uniform(-10, 10, samples)
+    paths = {
+        "text": os.path.join(directory, "inputs.txt"),
+        "npy": os.path.join(directory, "inputs.npy"),
+        "bin": os.path.join(directory, "inputs.bin"),
+        "run": os.path.join(directory, "run"),
+    }
+    np.savetxt(paths["text"], values)
+    np.save(paths["npy"], values)
+    values.astype("<f8").tofile(paths["bin"])
+    record(paths["run"], values)
+    return paths
+
+
+def record(directory, values):
+    recorder = RunRecorder(directory, ProcessSimulation.COLUMNS)
+    for index, value in enumerate(values):
+        recorder.record((index, value, value, value, 0.0, value))
+    recorder.close()
+
+
+def read_source(path):
+    source = open_input_source(path)
+    count = 0
+    while True:
+        chunk = source.read()
+        if len(chunk) == 0:
+            break
+        count += len(chunk)
+    source.close()
+    return count
+
+
+def run(samples=1000000):
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_inputs(directory, samples)
+        for name, path in paths.items():
+            results[f"{name}_source"] = bench_utils.measure(
+                lambda path=path: read_source(path), samples, "values"
+            )
+            if os.path.isfile(path):
+                results[f"{name}_source"]["megabytes"] = os.path.getsize(path) / 2**20
+        for name in ("text", "npy"):
+            results[f"{name}_load_inputs"] = bench_utils.measure(
+                lambda name=name: load_inputs(paths[name]), samples, "values"
+            )
+        results["run_load"] = bench_utils.measure(
+            lambda: load_run(paths["run"]), samples, "values"
+        )
+
+        values = np.zeros(samples // 10)
+        count = [0]
+
+        def record_run():
+            count[0] += 1
+            record(os.path.join(directory, f"record_{count[0]}"), values)
+
+        results["run_record"] = bench_utils.measure(record_run, len(values), "values")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {"environment": bench_utils.environment(), "ingestion": run(args.samples)}
+    bench_utils.print_rates(results["ingestion"], "values")
+    if args.output:
+        bench_utils.write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
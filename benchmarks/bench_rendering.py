@@ -0,0 +1,158 @@
+"""
+bench_rendering.py
+Frame time of the persistent, blitted and full history plots against rebuilding.
+Version: 1.0.2
+"""
+import time
+import argparse
+import statistics
+import bench_utils
+from matplotlib.spines import Spine
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from history_index import HistoryIndex
+from live_plot import ProcessPlot
+from process_engine import ProcessSimulation
+
+
+def rebuild_frame(figure, axes, simulation):
+    """Per tick rendering used before ProcessPlot: clear, restyle and replot."""
+    for ax, datas, title in (
+        (
+            axes[1],
+            [simulation.input_data, simulation.noise_data],
+            "Noise and Manipulation",
+        ),
+        (axes[0], [simulation.output_data], "Output"),
+    ):
+        ax.set_facecolor("#252526")
+        for child in ax.get_children():
+            if isinstance(child, Spine):
+                child.set_color("white")
+        ax.tick_params(axis="both", colors="white")
+        ax.clear()
+        ax.set_title(title, color="white")
+        ax.set_ylim([-10, 100])
+        colors = ["lime", "red", "white"]
+        samples = simulation.time
+        for data in range(len(datas)):
+            ax.plot(
+                list(range(samples - len(datas[data]), samples)),
+                datas[data].values(),
+                ".-",
+                color=colors[data],
+            )
+        figure.tight_layout()
+        figure.canvas.draw()
+
+
+def new_figure():
+    figure = Figure(figsize=(12, 6))
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def time_frames(render, simulation, frames):
+    timings = list()
+    for _ in range(frames):
+        simulation.step()
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        "frames": len(timings),
+        "mean_ms": statistics.mean(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+    }
+
+
+def measure_frames(render, simulation, frames):
+    """Frame time summary and peak memory of rendering `frames` frames."""
+    result = summarize(time_frames(render, simulation, frames))
+    result["peak_kib"] = bench_utils.peak_memory(
+        lambda: time_frames(render, simulation, min(frames, 10))
+    )
+    return result
+
+
+def history_samples(count):
+    """`count` samples of a step response with noise, as a simulation gives them."""
+    simulation = ProcessSimulation()
+    simulation.magnitude = 50
+    simulation.noise = 0.5
+    samples = list()
+    for _ in range(count):
+        simulation.step()
+        samples.append(simulation.sample)
+    return samples
+
+
+def run(frames=200, window=50, history=1000000):
+    results = dict()
+
+    simulation = ProcessSimulation(history_size=window)
+    simulation.magnitude = 50
+    figure = new_figure()
+    axes = (figure.add_subplot(211), figure.add_subplot(212))
+    results["rebuild"] = measure_frames(
+        lambda: rebuild_frame(figure, axes, simulation), simulation, frames
+    )
+
+    # Agg services draw_idle immediately, every frame is fully rendered.
+    for name, blit in (("draw_idle", False), ("blit", True)):
+        simulation = ProcessSimulation(history_size=window)
+        simulation.magnitude = 50
+        plot = ProcessPlot(new_figure(), window, blit=blit)
+        plot.figure.canvas.draw()
+        results[name] = measure_frames(
+            lambda: plot.update(simulation), simulation, frames
+        )
+
+    # Full history of `history` samples drawn from the min/max index.
+    index = HistoryIndex(ProcessSimulation.COLUMNS)
+    index.extend(history_samples(history))
+    plot = ProcessPlot(new_figure(), window)
+    plot.show_history(index)
+    plot.figure.canvas.draw()
+    results["history"] = measure_frames(
+        lambda: plot.update(simulation), simulation, frames
+    )
+
+    results["speedup"] = results["rebuild"]["mean_ms"] / results["blit"]["mean_ms"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--window", type=int, default=50)
+    parser.add_argument(
+        "--history", type=int, default=1000000, help="samples of the full history"
+    )
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.frames, args.window, args.history)
+    for name in ("rebuild", "draw_idle", "blit", "history"):
+        summary = results[name]
+        print(
+            f"{name:>10}: mean {summary['mean_ms']:.2f} ms"
+            f"  median {summary['median_ms']:.2f} ms  p95 {summary['p95_ms']:.2f} ms"
+            f"  peak {summary['peak_kib']:,.0f} KiB"
+        )
+    print(f"   speedup: {results['speedup']:.1f}x")
+    if args.output:
+        bench_utils.write_results(
+            {"environment": bench_utils.environment(), "rendering": results},
+            args.output,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+bench_stepping.py
+Open loop and closed loop steps per second of the process models.
+Version: 1.0.2
+"""
+import argparse
+import bench_utils
+import numpy as np
+from batch_simulation import simulate_open_loop
+from closed_loop_kernel import simulate_closed_loop, simulate_closed_loop_batch
+from fleet_engine import ProcessFleet
+from process_engine import FirstOrderProcess, PIDController, ProcessSimulation
+from process_models import SecondOrderProcess
+
+
+def run_open_loop(steps=100000, loops=1000):
+    """Plant steps per second with a step input, one plant or a fleet of loops."""
+    inputs = np.ones(steps)
+    results = dict()
+
+    process = FirstOrderProcess()
+    results["first_order_step"] = bench_utils.measure(
+        lambda: [process.step(1.0) for _ in range(steps)], steps, "steps"
+    )
+    simulation = ProcessSimulation()
+    simulation.magnitude = 1.0
+    results["simulation_manual"] = bench_utils.measure(
+        lambda: simulation.run(steps), steps, "steps"
+    )
+    results["first_order_batch"] = bench_utils.measure(
+        lambda: simulate_open_loop(inputs), steps, "steps"
+    )
+    second_order = SecondOrderProcess()
+    results["second_order_step"] = bench_utils.measure(
+        lambda: [second_order.step(1.0) for _ in range(steps // 10)],
+        steps // 10,
+        "steps",
+    )
+    results["second_order_batch"] = bench_utils.measure(
+        lambda: second_order.simulate(inputs), steps, "steps"
+    )
+    fleet = ProcessFleet(loops)
+    fleet.magnitude = 1.0
+    fleet_steps = max(steps // loops, 10)
+    results[f"fleet_{loops}_manual"] = bench_utils.measure(
+        lambda: fleet.run(fleet_steps), fleet_steps * loops, "steps"
+    )
+    return results
+
+
+def run_closed_loop(steps=100000, loops=1000):
+    """PID controlled steps per second, one loop or a fleet of loops."""
+    results = dict()
+
+    simulation = ProcessSimulation()
+    simulation.auto_mode = True
+    simulation.set_point = 1.0
+    results["simulation_auto"] = bench_utils.measure(
+        lambda: simulation.run(steps), steps, "steps"
+    )
+    second_order = ProcessSimulation(SecondOrderProcess())
+    second_order.auto_mode = True
+    second_order.set_point = 1.0
+    results["second_order_auto"] = bench_utils.measure(
+        lambda: second_order.run(steps // 10), steps // 10, "steps"
+    )
+    simulate_closed_loop(10, set_point=1.0)
+    results["kernel_auto"] = bench_utils.measure(
+        lambda: simulate_closed_loop(steps, set_point=1.0), steps, "steps"
+    )
+    processes = [FirstOrderProcess() for _ in range(loops)]
+    controllers = [PIDController() for _ in range(loops)]
+    kernel_steps = max(steps // loops, 10)
+    results[f"kernel_{loops}_auto"] = bench_utils.measure(
+        lambda: simulate_closed_loop_batch(
+            kernel_steps, processes, controllers, set_point=1.0
+        ),
+        kernel_steps * loops,
+        "steps",
+    )
+    fleet = ProcessFleet(loops)
+    fleet.auto_mode = True
+    fleet.set_point = 1.0
+    fleet_steps = max(steps // loops, 10)
+    results[f"fleet_{loops}_auto"] = bench_utils.measure(
+        lambda: fleet.run(fleet_steps), fleet_steps * loops, "steps"
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--steps", type=int, default=100000)
+    parser.add_argument("--loops", type=int, default=1000)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {
+        "environment": bench_utils.environment(),
+        "open_loop": run_open_loop(args.steps, args.loops),
+        "closed_loop": run_closed_loop(args.steps, args.loops),
+    }
+    for part in ("open_loop", "closed_loop"):
+        print(part)
+        bench_utils.print_rates(results[part], "steps")
+    if args.output:
+        bench_utils.write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+bench_utils.py
+Timing, peak memory and result files shared by the benchmarks.
+Version: 1.0.2
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def best_time(function, repeat=3):
+    """Return the shortest wall time in seconds of `repeat` calls of `function`."""
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory(function):
+    """Return the peak memory in KiB allocated by Python while `function` runs."""
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def measure(function, count, unit, repeat=3):
+    """
+    Time `function`, which processes `count` units, and measure its peak
+    memory in a separate call, since tracing allocations slows it down.
+    """
+    seconds = best_time(function, repeat)
+    return {
+        "count": count,
+        "seconds": seconds,
+        f"{unit}_per_s": count / seconds,
+        "peak_kib": peak_memory(function),
+    }
+
+
+def environment():
+    import numpy
+    import matplotlib
+
+    try:
+        import numba
+
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "matplotlib": matplotlib.__version__,
+        "numba": numba_version,
+    }
+
+
+def write_results(results, path):
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2)
+
+
+def print_rates(results, unit):
+    for name, result in results.items():
+        print(
+            f"{name:>24}: {result[f'{unit}_per_s']:>14,.0f} {unit}/s"
+            f"  peak {result['peak_kib']:>10,.0f} KiB"
+        )
@@ -0,0 +1,96 @@
+"""
+run_benchmarks.py
+Run every benchmark, write the results and compare them with a baseline.
+Version: 1.0.2
+"""
+import sys
+import json
+import argparse
+import bench_utils
+import bench_ingestion
+import bench_rendering
+import bench_stepping
+
+SIZES = {
+    "full": {"steps": 100000, "loops": 1000, "frames": 200, "samples": 1000000},
+    "quick": {"steps": 10000, "loops": 100, "frames": 30, "samples": 100000},
+}
+HIGHER_IS_BETTER = ("steps_per_s", "values_per_s")
+LOWER_IS_BETTER = ("mean_ms", "median_ms", "p95_ms", "peak_kib")
+
+
+def run(size="full"):
+    sizes = SIZES[size]
+    return {
+        "environment": bench_utils.environment(),
+        "size": size,
+        "open_loop": bench_stepping.run_open_loop(sizes["steps"], sizes["loops"]),
+        "closed_loop": bench_stepping.run_closed_loop(sizes["steps"], sizes["loops"]),
+        "rendering": bench_rendering.run(sizes["frames"], history=sizes["samples"]),
+        "ingestion": bench_ingestion.run(sizes["samples"]),
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Return a line for every measurement more than `tolerance` worse than in
+    `baseline`, rates falling or times and peak memory growing.
+    """
+    regressions = list()
+    for part, cases in results.items():
+        if not isinstance(cases, dict) or part == "environment":
+            continue
+        for case, result in cases.items():
+            reference = baseline.get(part, dict()).get(case)
+            if not isinstance(result, dict) or not isinstance(reference, dict):
+                continue
+            for key, value in result.items():
+                old = reference.get(key)
+                if not old:
+                    continue
+                if key in HIGHER_IS_BETTER and value < old * (1 - tolerance):
+                    change = value / old - 1
+                elif key in LOWER_IS_BETTER and value > old * (1 + tolerance):
+                    change = value / old - 1
+                else:
+                    continue
+                regressions.append(
+                    f"{part}/{case} {key}: {old:,.2f} -> {value:,.2f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="smaller problem sizes")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run("quick" if args.quick else "full")
+    for part in ("open_loop", "closed_loop"):
+        print(part)
+        bench_utils.print_rates(results[part], "steps")
+    print("rendering")
+    for name in ("rebuild", "draw_idle", "blit"):
+        summary = results["rendering"][name]
+        print(
+            f"{name:>24}: {summary['mean_ms']:>10.2f} ms/frame"
+            f"  peak {summary['peak_kib']:>10,.0f} KiB"
+        )
+    print("ingestion")
+    bench_utils.print_rates(results["ingestion"], "values")
+    bench_utils.write_results(results, args.output)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
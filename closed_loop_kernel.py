@@ -0,0 +1,164 @@
+"""
+closed_loop_kernel.py
+Closed loop PID and first order plus dead time recursion, compiled with Numba when available.
+Version: 1.0.2
+"""
+import numpy as np
+from process_engine import FirstOrderProcess, PIDController
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def closed_loop(
+    a1,
+    b1,
+    b2,
+    n_value,
+    q0,
+    q1,
+    q2,
+    auto,
+    magnitude,
+    set_point,
+    noise,
+    inputs,
+    system,
+    output,
+    set_points,
+):
+    """
+    Step one loop over every sample of the per sample `auto`, `magnitude`,
+    `set_point` and `noise` arrays, filling `inputs`, `system`, `output` and
+    `set_points`. The statements follow ProcessSimulation.step exactly.
+    """
+    state = 0.0
+    e_k0 = 0.0
+    e_k1 = 0.0
+    e_k2 = 0.0
+    m_k = 0.0
+    for t in range(len(inputs)):
+        value = m_k if auto[t] else magnitude[t]
+        inputs[t] = value
+        if t - n_value - 2 > -1:
+            state = a1 * state + b1 * inputs[t - n_value] + b2 * inputs[t - n_value - 1]
+        elif t - n_value - 1 > -1:
+            state = a1 * state + b1 * inputs[t - n_value]
+        elif t > 0:
+            state = a1 * state
+        else:
+            state = 0.0
+        system[t] = state
+        output[t] = state + noise[t]
+        reference = set_point[t] if auto[t] else output[t]
+        set_points[t] = reference
+        e_k2 = e_k1
+        e_k1 = e_k0
+        e_k0 = reference - output[t]
+        m_k = value + q0 * e_k0 + q1 * e_k1 + q2 * e_k2
+
+
+def closed_loop_batch(
+    coefficients, auto, magnitude, set_point, noise, inputs, system, output, set_points
+):
+    """Run `closed_loop` for every row of coefficients a1, b1, b2, N, q0, q1, q2."""
+    for loop in range(len(coefficients)):
+        a1, b1, b2, n_value, q0, q1, q2 = coefficients[loop]
+        closed_loop(
+            a1,
+            b1,
+            b2,
+            int(n_value),
+            q0,
+            q1,
+            q2,
+            auto[loop],
+            magnitude[loop],
+            set_point[loop],
+            noise[loop],
+            inputs[loop],
+            system[loop],
+            output[loop],
+            set_points[loop],
+        )
+
+
+if njit is not None:
+    closed_loop = njit(cache=True)(closed_loop)
+    closed_loop_batch = njit(cache=True)(closed_loop_batch)
+
+COMPILED = njit is not None
+
+
+def coefficient_rows(processes, controllers):
+    return np.array(
+        [
+            (p.a1, p.b1, p.b2, p.n_value, c.q0, c.q1, c.q2)
+            for p, c in zip(processes, controllers)
+        ],
+        dtype=float,
+    ).reshape(-1, 7)
+
+
+def simulate_closed_loop(
+    steps,
+    process=None,
+    controller=None,
+    set_point=0.0,
+    auto=True,
+    magnitude=0.0,
+    noise=0.0,
+):
+    """
+    Return the (inputs, system, output, set_point) arrays of `steps` samples of
+    a ProcessSimulation started from rest.
+
+    `auto`, `magnitude`, `set_point` and `noise` are scalars or arrays with
+    one value per sample, so mode and set point changes can be scheduled.
+    The results are identical to stepping ProcessSimulation.
+    """
+    process = process if process is not None else FirstOrderProcess()
+    controller = (
+        controller if controller is not None else PIDController(period=process.period)
+    )
+    results = simulate_closed_loop_batch(
+        steps, [process], [controller], set_point, auto, magnitude, noise
+    )
+    return tuple(result[0] for result in results)
+
+
+def simulate_closed_loop_batch(
+    steps, processes, controllers, set_point=0.0, auto=True, magnitude=0.0, noise=0.0
+):
+    """
+    Return (inputs, system, output, set_point) arrays with one row per pair of
+    `processes` and `controllers`, each simulated for `steps` samples.
+
+    `auto`, `magnitude`, `set_point` and `noise` are scalars, arrays of one
+    value per sample or arrays of shape (loops, steps).
+    """
+    coefficients = coefficient_rows(processes, controllers)
+    shape = (len(coefficients), steps)
+    auto = np.ascontiguousarray(np.broadcast_to(np.asarray(auto, dtype=bool), shape))
+    magnitude, set_point, noise = (
+        np.ascontiguousarray(np.broadcast_to(np.asarray(value, dtype=float), shape))
+        for value in (magnitude, set_point, noise)
+    )
+    if COMPILED:
+        results = tuple(np.zeros(shape) for _ in range(4))
+        closed_loop_batch(coefficients, auto, magnitude, set_point, noise, *results)
+        return results
+
+    # Without Numba the same loop is several times faster over lists.
+    results = tuple([[0.0] * steps for _ in coefficients] for _ in range(4))
+    closed_loop_batch(
+        coefficients.tolist(),
+        auto.tolist(),
+        magnitude.tolist(),
+        set_point.tolist(),
+        noise.tolist(),
+        *results,
+    )
+    return tuple(np.array(result).reshape(shape) for result in results)
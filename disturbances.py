@@ -0,0 +1,155 @@
+"""
+disturbances.py
+Seeded stochastic and scheduled disturbances generated in batches.
+Version: 1.0.2
+"""
+import math
+import numpy as np
+from batch_simulation import first_order_filter
+
+
+class Disturbance:
+    """
+    Disturbance added to the process output, generated `chunk_size` samples
+    at a time.
+
+    `generate(count)` returns the next `count` samples as an array and `read`
+    the next chunk as a list, like the input sources. The sequence is fixed
+    by `seed`, when None a seed is drawn and kept in `seed`, and `reset`
+    starts the same sequence over.
+    """
+
+    def __init__(self, seed=None, chunk_size=4096):
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.chunk_size = chunk_size
+        self.reset()
+
+    def reset(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.time = 0
+
+    def read(self):
+        return self.generate(self.chunk_size).tolist()
+
+    def generate(self, count):
+        values = self.samples(count)
+        self.time += count
+        return values
+
+    def samples(self, count):
+        raise NotImplementedError
+
+
+class WhiteNoise(Disturbance):
+    """Independent normal samples of standard deviation `std` around `mean`."""
+
+    def __init__(self, std=1.0, mean=0.0, seed=None, chunk_size=4096):
+        self.std = std
+        self.mean = mean
+        super(WhiteNoise, self).__init__(seed, chunk_size)
+
+    def samples(self, count):
+        return self.mean + self.std * self.rng.standard_normal(count)
+
+
+class ColoredNoise(Disturbance):
+    """
+    First order autoregressive noise x(k) = r x(k - 1) + e(k) starting at
+    zero, with the variance of e(k) chosen so that x has standard deviation
+    `std` and `correlation` r between consecutive samples.
+    """
+
+    def __init__(self, std=1.0, correlation=0.9, seed=None, chunk_size=4096):
+        if not 0 <= correlation < 1:
+            raise ValueError("correlation must be in [0, 1)")
+        self.std = std
+        self.correlation = correlation
+        super(ColoredNoise, self).__init__(seed, chunk_size)
+
+    def reset(self):
+        super(ColoredNoise, self).reset()
+        self.last = 0.0
+
+    def samples(self, count):
+        scale = self.std * math.sqrt(1 - self.correlation**2)
+        values = first_order_filter(
+            scale * self.rng.standard_normal(count), self.correlation, self.last
+        )
+        if count:
+            self.last = values[-1]
+        return values
+
+
+class RandomWalk(Disturbance):
+    """Sum of independent normal steps of standard deviation `step_std`."""
+
+    def __init__(self, step_std=1.0, initial=0.0, seed=None, chunk_size=4096):
+        self.step_std = step_std
+        self.initial = initial
+        super(RandomWalk, self).__init__(seed, chunk_size)
+
+    def reset(self):
+        super(RandomWalk, self).reset()
+        self.last = self.initial
+
+    def samples(self, count):
+        values = self.last + np.cumsum(self.step_std * self.rng.standard_normal(count))
+        if count:
+            self.last = values[-1]
+        return values
+
+
+class LoadProfile(Disturbance):
+    """
+    Scheduled load disturbance, `schedule` is a sequence of (sample, level)
+    pairs and the disturbance holds each level from its sample until the
+    next one, starting at zero.
+    """
+
+    def __init__(self, schedule, chunk_size=4096):
+        schedule = sorted(schedule)
+        self.starts = np.array([sample for sample, _ in schedule], dtype=np.int64)
+        self.levels = np.array([0.0] + [level for _, level in schedule])
+        super(LoadProfile, self).__init__(0, chunk_size)
+
+    def samples(self, count):
+        times = np.arange(self.time, self.time + count)
+        return self.levels[np.searchsorted(self.starts, times, side="right")]
+
+
+class CombinedDisturbance(Disturbance):
+    """Sum of the samples of several disturbances."""
+
+    def __init__(self, components, chunk_size=4096):
+        self.components = list(components)
+        super(CombinedDisturbance, self).__init__(0, chunk_size)
+
+    def reset(self):
+        super(CombinedDisturbance, self).reset()
+        for component in self.components:
+            component.reset()
+
+    def samples(self, count):
+        values = np.zeros(count)
+        for component in self.components:
+            values += component.generate(count)
+        return values
+
+
+KINDS = ("white", "colored", "random_walk")
+
+
+def create_disturbance(kind, magnitude, seed=None, correlation=0.9):
+    """
+    Return white or colored noise of standard deviation `magnitude`, or a
+    random walk with steps of that standard deviation.
+    """
+    if kind == "white":
+        return WhiteNoise(magnitude, seed=seed)
+    if kind == "colored":
+        return ColoredNoise(magnitude, correlation, seed=seed)
+    if kind == "random_walk":
+        return RandomWalk(magnitude, seed=seed)
+    raise ValueError(
+        f"unknown disturbance {kind!r}, expected one of {', '.join(KINDS)}"
+    )
@@ -0,0 +1,333 @@
+"""
+fleet_dashboard.py
+Dashboard of a fleet of control loops simulated together.
+Version: 1.0.2
+"""
+import sys
+import argparse
+import numpy as np
+from PyQt5 import QtWidgets, QtCore
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from fleet_engine import ProcessFleet
+from live_plot import ProcessPlot
+from parameter_sweep import PARAMETERS, sample_parameters
+from simulation_clock import SimulationClock
+from simulation_worker import SimulationWorker
+
+
+def parse_selection(text, loops):
+    """Return the loop indices in `text`, such as "0-4, 10, 12"."""
+    selection = list()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        indices = range(int(first), int(last or first) + 1)
+        if not indices:
+            raise ValueError(f"range {part} must go from the lower loop to the higher")
+        if indices[0] < 0 or indices[-1] >= loops:
+            raise ValueError(f"loops are numbered from 0 to {loops - 1}")
+        selection.extend(indices)
+    return selection
+
+
+class FleetHistory:
+    """Last `capacity` outputs and errors of every loop in a fleet."""
+
+    def __init__(self, capacity, loops):
+        self.capacity = capacity
+        self.time_data = np.zeros(capacity, dtype=np.int64)
+        self.output_data = np.zeros((capacity, loops))
+        self.error_data = np.zeros((capacity, loops))
+        self.count = 0
+        self.time = 0
+
+    def clear(self):
+        self.count = 0
+        self.time = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def extend(self, samples):
+        for time, _, _, output, _, set_point in samples[-self.capacity :]:
+            row = self.count % self.capacity
+            self.time_data[row] = time
+            self.output_data[row] = output
+            self.error_data[row] = set_point - output
+            self.count += 1
+        if samples:
+            self.time = samples[-1][0] + 1
+
+    def ordered(self, data):
+        """Return the rows of `data` held, oldest first."""
+        return data[np.arange(self.count - len(self), self.count) % self.capacity]
+
+
+class FleetPlot:
+    """Outputs of the selected loops and the spread of the outputs of all loops."""
+
+    def __init__(self, figure, window=100):
+        self.figure = figure
+        self.window = window
+        self.selected_axes = figure.add_subplot(211)
+        self.fleet_axes = figure.add_subplot(212)
+        ProcessPlot.style_axes(self.selected_axes, "Selected Loops", (-1, 1))
+        ProcessPlot.style_axes(self.fleet_axes, "All Loops", (-1, 1))
+        self.selected_lines = list()
+        (self.mean_line,) = self.fleet_axes.plot([], [], color="lime")
+        (self.min_line,) = self.fleet_axes.plot([], [], color="red")
+        (self.max_line,) = self.fleet_axes.plot([], [], color="red")
+        self.figure.tight_layout()
+
+    def select(self, count):
+        for line in self.selected_lines:
+            line.remove()
+        self.selected_lines = [self.selected_axes.plot([], [])[0] for _ in range(count)]
+
+    def update(self, history, selection):
+        x_data = history.ordered(history.time_data)
+        outputs = history.ordered(history.output_data)
+        for line, loop in zip(self.selected_lines, selection):
+            line.set_data(x_data, outputs[:, loop])
+        if len(x_data) > 0:
+            self.mean_line.set_data(x_data, outputs.mean(axis=1))
+            self.min_line.set_data(x_data, outputs.min(axis=1))
+            self.max_line.set_data(x_data, outputs.max(axis=1))
+        last = history.time - 1
+        for ax in (self.selected_axes, self.fleet_axes):
+            ax.set_xlim(max(last - self.window, 0) - 0.5, max(last, self.window) + 0.5)
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+        self.figure.canvas.draw_idle()
+
+    def clear(self):
+        lines = self.selected_lines + [self.mean_line, self.min_line, self.max_line]
+        for line in lines:
+            line.set_data([], [])
+        self.figure.canvas.draw_idle()
+
+
+class FleetWindow(QtWidgets.QDialog):
+    """
+    Dashboard of a ProcessFleet stepped by a SimulationWorker, showing the
+    selected loops, the mean, minimum and maximum output of all loops and
+    error statistics of the last sample.
+    """
+
+    def __init__(
+        self,
+        fleet,
+        parent=None,
+        plot_window=100,
+        speed=1.0,
+        frame_rate=30,
+        selection="0-4",
+    ):
+        super(FleetWindow, self).__init__(parent)
+        self.fleet = fleet
+        # Outputs when the set point last changed, the start of the step.
+        self.initial = np.zeros(fleet.loops)
+        self.time_on = False
+        self.selection = list()
+        self.clock = SimulationClock(
+            period=float(fleet.period.min()),
+            speed=speed,
+            frame_rate=frame_rate,
+            max_steps=500,
+        )
+        self.history = FleetHistory(plot_window, fleet.loops)
+        self.worker = SimulationWorker(fleet, self.clock, max_batch=100)
+        self.worker.start()
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update_figure)
+        self.timer.start(self.clock.frame_interval)
+
+        self.setWindowTitle(f"Dynamic Process Simulator - {fleet.loops} loops")
+        self.setStyleSheet("background-color:#252526;")
+        self.figure = Figure()
+        self.figure.set_facecolor("none")
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.setMinimumSize(1200, 600)
+        self.plot = FleetPlot(self.figure, plot_window)
+
+        self.selection_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.selection_line_edit.returnPressed.connect(self.select_loops)
+        self.manual_mode = QtWidgets.QRadioButton(
+            self, text="Manual Mode", checked=True, styleSheet="color : white"
+        )
+        self.auto_mode = QtWidgets.QRadioButton(
+            self, text="Auto Mode", styleSheet="color : white"
+        )
+        self.auto_mode.toggled.connect(self.set_auto_mode)
+        self.magnitude_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.magnitude_line_edit.returnPressed.connect(self.set_magnitude)
+        self.set_point_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.set_point_line_edit.returnPressed.connect(self.set_set_point)
+        self.reset_button = QtWidgets.QPushButton("Reset", styleSheet="color : white;")
+        self.reset_button.setAutoDefault(False)
+        self.reset_button.clicked.connect(self.reset)
+        self.stats_label = QtWidgets.QLabel(self, styleSheet="color : white")
+
+        hbox = QtWidgets.QHBoxLayout()
+        hbox.addWidget(QtWidgets.QLabel(text="Loops:", styleSheet="color : white"))
+        hbox.addWidget(self.selection_line_edit)
+        hbox.addWidget(self.manual_mode)
+        hbox.addWidget(self.auto_mode)
+        hbox.addWidget(
+            QtWidgets.QLabel(text="Magnitude of step (Mo):", styleSheet="color : white")
+        )
+        hbox.addWidget(self.magnitude_line_edit)
+        hbox.addWidget(
+            QtWidgets.QLabel(text="Set Point (r):", styleSheet="color : white")
+        )
+        hbox.addWidget(self.set_point_line_edit)
+        hbox.addWidget(self.reset_button)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(hbox)
+        layout.addWidget(self.stats_label)
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+
+        self.selection_line_edit.setText(selection)
+        self.select_loops()
+
+    def select_loops(self):
+        try:
+            selection = parse_selection(
+                self.selection_line_edit.text(), self.fleet.loops
+            )
+        except ValueError as error:
+            print(error)
+            return
+        self.selection = selection
+        self.plot.select(len(selection))
+        self.plot_graphs()
+
+    def set_auto_mode(self, checked):
+        with self.worker.lock:
+            self.fleet.auto_mode = checked
+            self.initial = self.fleet.output.copy()
+
+    def set_magnitude(self):
+        try:
+            magnitude = float(self.magnitude_line_edit.text())
+        except ValueError:
+            return
+        with self.worker.lock:
+            self.fleet.magnitude = magnitude
+        self.time_on = True
+
+    def set_set_point(self):
+        try:
+            set_point = float(self.set_point_line_edit.text())
+        except ValueError:
+            return
+        with self.worker.lock:
+            self.fleet.set_point = set_point
+            self.initial = self.fleet.output.copy()
+        self.time_on = True
+
+    def reset(self):
+        self.worker.reset()
+        with self.worker.lock:
+            self.fleet.magnitude = 0.0
+            self.initial = np.zeros(self.fleet.loops)
+        self.time_on = False
+        self.history.clear()
+        self.plot.clear()
+        self.magnitude_line_edit.clear()
+        self.set_point_line_edit.clear()
+        self.manual_mode.setChecked(True)
+
+    def update_figure(self):
+        if self.worker.error is not None:
+            print(self.worker.error)
+            self.worker.error = None
+            self.time_on = False
+        self.worker.running = self.time_on
+        samples = self.worker.take_samples()
+        if samples:
+            self.history.extend(samples)
+            self.update_labels()
+            self.plot_graphs()
+
+    def update_labels(self):
+        error = self.history.ordered(self.history.error_data)[-1]
+        set_point = self.history.ordered(self.history.output_data)[-1] + error
+        error = np.abs(error)
+        worst = int(error.argmax())
+        # Within 2% of the step to the set point, as the settling time.
+        settled = np.count_nonzero(error <= 0.02 * np.abs(set_point - self.initial))
+        self.stats_label.setText(
+            f"k = {self.history.time - 1}    mean |error| = {error.mean():.3f}"
+            f"    worst loop {worst} |error| = {error[worst]:.3f}"
+            f"    within 2%: {settled} of {self.fleet.loops}"
+        )
+
+    def plot_graphs(self):
+        if len(self.history) > 0:
+            self.plot.update(self.history, self.selection)
+
+    def closeEvent(self, event):
+        self.worker.stop()
+        super(FleetWindow, self).closeEvent(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate a fleet of loops with parameters drawn around nominal."
+    )
+    parser.add_argument("--loops", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=0.2)
+    parser.add_argument(
+        "--distribution", choices=("uniform", "normal", "lognormal"), default="uniform"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--kc", type=float, default=1.957983)
+    parser.add_argument("--ti", type=float, default=4.564447)
+    parser.add_argument("--td", type=float, default=0.476814)
+    parser.add_argument("--select", default="0-4", help="loops plotted, such as 0-4,10")
+    parser.add_argument("--plot-window", type=int, default=100)
+    parser.add_argument(
+        "--speed",
+        type=lambda text: None if text == "max" else float(text),
+        default=1.0,
+        help="simulated time per wall time, or max to run as fast as possible",
+    )
+    parser.add_argument("--frame-rate", type=float, default=30)
+    args = parser.parse_args(argv)
+
+    samples = sample_parameters(
+        args.loops,
+        args.spread,
+        args.distribution,
+        args.seed,
+        vary=("gain", "tau", "theta_prime"),
+    )
+    fleet = ProcessFleet(
+        args.loops,
+        *(np.array([sample[name] for sample in samples]) for name in PARAMETERS),
+        kc=args.kc,
+        integral_constant=args.ti,
+        derivative_constant=args.td,
+    )
+
+    app = QtWidgets.QApplication([])
+    window = FleetWindow(
+        fleet,
+        plot_window=args.plot_window,
+        speed=args.speed,
+        frame_rate=args.frame_rate,
+        selection=args.select,
+    )
+    window.show()
+    status = app.exec_()
+    window.worker.stop()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
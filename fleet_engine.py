@@ -0,0 +1,234 @@
+"""
+fleet_engine.py
+Many independent process and PID controller loops advanced together with numpy.
+Version: 1.0.2
+"""
+import numpy as np
+from process_engine import (
+    FirstOrderProcess,
+    controller_coefficients,
+    process_coefficients,
+)
+
+
+class ProcessFleet:
+    """
+    `loops` first order plus dead time processes, each closed by its own PID
+    controller, advanced with one vectorized step per sample.
+
+    Parameters are scalars shared by every loop or arrays with one value per
+    loop, and so are `auto_mode`, `magnitude`, `set_point` and `noise`. The
+    dead time delay lines hold the last `delay_depth` inputs of every loop,
+    grown when a dead time N + 2 does not fit in them.
+    Each step gives the same values as a ProcessSimulation per loop.
+    """
+
+    COLUMNS = ("time", "input", "system", "output", "noise", "set_point")
+
+    def __init__(
+        self,
+        loops,
+        gain=1.0,
+        tau=3.34,
+        theta_prime=1.46,
+        period=1.0,
+        kc=1.957983,
+        integral_constant=4.564447,
+        derivative_constant=0.476814,
+        delay_depth=256,
+    ):
+        self.loops = loops
+        self.delay_depth = delay_depth
+        self.time = 0
+        self.input_data = np.zeros((delay_depth, loops))
+        self.loop_index = np.arange(loops)
+        self.set_parameters(gain, tau, theta_prime, period)
+        self.set_controller_parameters(kc, integral_constant, derivative_constant)
+
+        self.auto_mode = np.zeros(loops, dtype=bool)
+        self.magnitude = np.zeros(loops)
+        self.set_point = np.zeros(loops)
+        self.noise = np.zeros(loops)
+        self.reset()
+
+    @classmethod
+    def from_simulation(cls, simulation, loops):
+        """
+        Return `loops` loops in the state of a ProcessSimulation of a first
+        order process, to branch continuations with other parameters, set
+        points or inputs from the same operating point.
+
+        Fleets only add a constant noise to the output and take their inputs
+        from `step`, so a simulation with a disturbance or an input profile
+        cannot be branched. Its metrics are not carried over, array_metrics
+        evaluates those of the outputs of the fleet.
+        """
+        process = simulation.process
+        controller = simulation.controller
+        if not isinstance(process, FirstOrderProcess):
+            raise ValueError("only first order processes can be branched")
+        if simulation.disturbance is not None:
+            raise ValueError("simulations with a disturbance cannot be branched")
+        if simulation.input_source is not None:
+            raise ValueError("simulations playing an input profile cannot be branched")
+        fleet = cls(
+            loops,
+            process.gain,
+            process.tau,
+            process.theta_prime,
+            process.period,
+            controller.kc,
+            controller.integral_constant,
+            controller.derivative_constant,
+            process.delay_depth,
+        )
+        fleet.auto_mode[:] = simulation.auto_mode
+        fleet.magnitude[:] = simulation.magnitude
+        fleet.set_point[:] = simulation.set_point
+        fleet.noise[:] = simulation.noise
+        fleet.time = simulation.time
+        fleet.input_data[:] = np.asarray(process.input_data.data)[:, np.newaxis]
+        if process.time <= process.delay_depth:
+            fleet.input_data[0] = 0.0
+        fleet.hold_oldest(process.input_data.first)
+        fleet.system[:] = process.output
+        if len(simulation.output_data) > 0:
+            fleet.output[:] = simulation.output_data[-1]
+        fleet.e_k0[:] = controller.e_k0
+        fleet.e_k1[:] = controller.e_k1
+        fleet.e_k2[:] = controller.e_k2
+        fleet.m_k[:] = controller.m_k
+        return fleet
+
+    def per_loop(self, value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (self.loops,))
+
+    def set_parameters(self, gain, tau, theta_prime, period):
+        gain, tau, theta_prime, period = (
+            self.per_loop(value) for value in (gain, tau, theta_prime, period)
+        )
+        if (
+            np.any(gain <= 0)
+            or np.any(tau <= 0)
+            or np.any(theta_prime <= 0)
+            or np.any(period <= 0)
+        ):
+            raise ValueError("gain, tau, theta_prime and period must be positive")
+        coefficients = np.array(
+            [
+                process_coefficients(*values)
+                for values in zip(gain, tau, theta_prime, period)
+            ]
+        ).reshape(self.loops, 4)
+        n_value = coefficients[:, 3].astype(int)
+        if n_value.max() + 2 > self.delay_depth:
+            self.resize_delay_lines(max(2 * self.delay_depth, n_value.max() + 2))
+        self.gain = gain
+        self.tau = tau
+        self.theta_prime = theta_prime
+        self.period = period
+        self.a1, self.b1, self.b2 = coefficients[:, :3].T.copy()
+        self.n_value = n_value
+        # Position of u(k - N) in the flattened delay lines, relative to k.
+        self.delay_offset = self.loop_index - n_value * self.loops
+
+    def resize_delay_lines(self, depth):
+        """Keep the inputs of the last samples in delay lines of `depth` samples."""
+        first = max(self.time - self.delay_depth, 0)
+        times = np.arange(first, self.time)
+        input_data = np.zeros((depth, self.loops))
+        input_data[times % depth] = self.input_data[times % self.delay_depth]
+        self.input_data = input_data
+        self.delay_depth = depth
+        self.hold_oldest(first)
+
+    def hold_oldest(self, first):
+        """
+        Fill the delay lines before sample `first`, the oldest input held, with
+        that input, which FirstOrderProcess reads in place of older ones. The
+        input at sample 0 stays zero, it never reaches the process.
+        """
+        if first > 0:
+            older = np.arange(max(self.time - self.delay_depth, 1), first)
+            self.input_data[older % self.delay_depth] = self.input_data[
+                first % self.delay_depth
+            ]
+
+    def set_controller_parameters(self, kc, integral_constant, derivative_constant):
+        kc, integral_constant, derivative_constant = (
+            self.per_loop(value)
+            for value in (kc, integral_constant, derivative_constant)
+        )
+        if np.any(integral_constant <= 0):
+            raise ValueError("integral_constant must be positive")
+        coefficients = np.array(
+            [
+                controller_coefficients(*values)
+                for values in zip(
+                    kc, integral_constant, derivative_constant, self.period
+                )
+            ]
+        ).reshape(self.loops, 3)
+        self.kc = kc
+        self.integral_constant = integral_constant
+        self.derivative_constant = derivative_constant
+        self.q0, self.q1, self.q2 = coefficients.T.copy()
+
+    def reset(self):
+        loops = self.loops
+        self.time = 0
+        self.sample = None
+        self.input_data = np.zeros((self.delay_depth, loops))
+        self.system = np.zeros(loops)
+        self.output = np.zeros(loops)
+        self.e_k0 = np.zeros(loops)
+        self.e_k1 = np.zeros(loops)
+        self.e_k2 = np.zeros(loops)
+        self.m_k = np.zeros(loops)
+
+    def input_ready(self):
+        """Inputs are given to `step`, the fleet never waits for them."""
+        return True
+
+    def step(self, inputs=None):
+        """
+        Advance every loop one sample and return the outputs c(k). Loops in
+        manual mode take `inputs` when given, their magnitude otherwise.
+        """
+        t = self.time
+        loops = self.loops
+        value = np.where(
+            self.auto_mode, self.m_k, self.magnitude if inputs is None else inputs
+        )
+        # The process starts at rest, the input at sample 0 never reaches it.
+        self.input_data[t % self.delay_depth] = value if t > 0 else 0.0
+        delayed = (t * loops + self.delay_offset) % self.input_data.size
+        delay_lines = self.input_data.reshape(-1)
+        system = (
+            self.a1 * self.system
+            + self.b1 * delay_lines.take(delayed)
+            + self.b2 * delay_lines.take(delayed - loops)
+        )
+        output = system + self.noise
+        set_point = np.where(self.auto_mode, self.set_point, output)
+
+        self.e_k2 = self.e_k1
+        self.e_k1 = self.e_k0
+        self.e_k0 = set_point - output
+        self.m_k = (
+            value + self.q0 * self.e_k0 + self.q1 * self.e_k1 + self.q2 * self.e_k2
+        )
+
+        self.system = system
+        self.output = output
+        self.set_point = set_point
+        self.sample = (t, value, system, output, self.noise, set_point)
+        self.time = t + 1
+        return output
+
+    def run(self, n_steps):
+        """Advance `n_steps` samples and return their outputs, one row per sample."""
+        outputs = np.empty((n_steps, self.loops))
+        for index in range(n_steps):
+            outputs[index] = self.step()
+        return outputs
@@ -0,0 +1,119 @@
+"""
+history_buffer.py
+Fixed size sample history kept in ring buffers.
+Version: 1.0.2
+"""
+from array import array
+
+
+class RingBuffer:
+    """
+    Array backed buffer keeping the last `capacity` appended values.
+
+    Indexing and iteration follow the order of the values still held, like a
+    list of the most recent samples, `at` looks values up by the number of
+    samples appended since the buffer was created or cleared. `first` is the
+    oldest sample that can still be held, later than the capacity allows
+    after the buffer grows.
+    """
+
+    def __init__(self, capacity, typecode="d"):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.typecode = typecode
+        self.data = array(typecode, bytes(capacity * array(typecode).itemsize))
+        self.count = 0
+        self.first = 0
+
+    def clear(self):
+        self.count = 0
+        self.first = 0
+
+    def append(self, value):
+        self.data[self.count % self.capacity] = value
+        self.count += 1
+
+    def extend(self, values):
+        """Append `values`, writing only those that stay in the buffer."""
+        skipped = max(len(values) - self.capacity, 0)
+        self.count += skipped
+        for value in values[skipped:]:
+            self.data[self.count % self.capacity] = value
+            self.count += 1
+
+    def resize(self, capacity):
+        """Change the capacity, keeping the most recent values that still fit."""
+        values = list(self)
+        self.capacity = capacity
+        self.data = array(
+            self.typecode, bytes(capacity * array(self.typecode).itemsize)
+        )
+        self.count -= len(values)
+        self.first = self.count
+        self.extend(values)
+
+    def __len__(self):
+        return min(self.count - self.first, self.capacity)
+
+    def __iter__(self):
+        start = self.count - len(self)
+        for index in range(start, self.count):
+            yield self.data[index % self.capacity]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("ring buffer index out of range")
+        return self.data[(self.count - size + index) % self.capacity]
+
+    def at(self, sample):
+        """Return the value appended as the `sample`-th one if still held."""
+        if not self.count - len(self) <= sample < self.count:
+            raise IndexError(f"sample {sample} is not held in the buffer")
+        return self.data[sample % self.capacity]
+
+    def values(self):
+        return list(self)
+
+
+class SampleHistory:
+    """
+    Ring buffers of the last `capacity` samples for each of `columns`.
+
+    Buffers are named after the columns, the "output" column is kept in
+    `output_data`, and `time` counts the samples after the last one held.
+    """
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.columns = columns
+        self.buffers = [
+            RingBuffer(capacity, "q" if name == "time" else "d") for name in columns
+        ]
+        for name, buffer in zip(columns, self.buffers):
+            setattr(self, f"{name}_data", buffer)
+        self.time = 0
+
+    def clear(self):
+        for buffer in self.buffers:
+            buffer.clear()
+        self.time = 0
+
+    def extend(self, samples):
+        if samples:
+            # Samples that would be overwritten are only counted.
+            kept = samples[-self.capacity :]
+            skipped = len(samples) - len(kept)
+            for buffer, values in zip(self.buffers, zip(*kept)):
+                buffer.count += skipped
+                buffer.extend(values)
+            self.time = samples[-1][0] + 1
+
+    def last(self):
+        """Return the last sample as a dictionary of column values."""
+        return {name: buffer[-1] for name, buffer in zip(self.columns, self.buffers)}
@@ -0,0 +1,170 @@
+"""
+history_index.py
+Multi resolution minimum and maximum index of the full history for plotting.
+Version: 1.0.2
+"""
+import math
+import numpy as np
+
+
+def append(data, count, values):
+    """Write `values` after the first `count` entries of `data`, growing it."""
+    if count + len(values) > len(data):
+        grown = np.empty(max(2 * len(data), count + len(values)))
+        grown[:count] = data[:count]
+        data = grown
+    data[count : count + len(values)] = values
+    return data
+
+
+def bucket_extremes(function, data, first, last, factor):
+    """Reduce the buckets `first` to `last` of `factor` values of `data`."""
+    result = data[first * factor : last * factor : factor].copy()
+    for offset in range(1, factor):
+        function(
+            result, data[first * factor + offset : last * factor : factor], out=result
+        )
+    return result
+
+
+class MinMaxPyramid:
+    """
+    Every value appended and, for every level l >= 1, the minimum and maximum
+    of each complete bucket of `factor` ** l values, updated as values arrive.
+
+    `query` returns at most about `max_points` points of a range of samples
+    from the finest level that fits, a minimum and a maximum per bucket, so
+    that peaks stay visible at any zoom.
+    """
+
+    def __init__(self, factor=4):
+        self.factor = factor
+        self.clear()
+
+    def clear(self):
+        self.values = np.empty(4096)
+        self.count = 0
+        self.minima = list()
+        self.maxima = list()
+        self.counts = list()
+
+    def extend(self, values):
+        factor = self.factor
+        self.values = append(self.values, self.count, values)
+        self.count += len(values)
+
+        below_minima = below_maxima = self.values
+        below_count = self.count
+        level = 0
+        while below_count >= factor:
+            if level == len(self.counts):
+                self.minima.append(np.empty(1024))
+                self.maxima.append(np.empty(1024))
+                self.counts.append(0)
+            done = self.counts[level]
+            complete = below_count // factor
+            if complete > done:
+                minima = bucket_extremes(
+                    np.minimum, below_minima, done, complete, factor
+                )
+                maxima = bucket_extremes(
+                    np.maximum, below_maxima, done, complete, factor
+                )
+                self.minima[level] = append(self.minima[level], done, minima)
+                self.maxima[level] = append(self.maxima[level], done, maxima)
+                self.counts[level] = complete
+            below_minima = self.minima[level]
+            below_maxima = self.maxima[level]
+            below_count = complete
+            level += 1
+
+    def drop(self, count):
+        """Forget the first `count` values, rebuilding the levels from the rest."""
+        values = self.values[count : self.count].copy()
+        self.clear()
+        self.extend(values)
+
+    def query(self, start, stop, max_points):
+        """Return the positions and values of the samples from `start` to `stop`."""
+        start = max(int(math.floor(start)), 0)
+        stop = min(int(math.ceil(stop)), self.count)
+        if stop <= start:
+            return np.zeros(0), np.zeros(0)
+        level = 0
+        points = stop - start
+        while points > max_points and level < len(self.counts):
+            level += 1
+            points = 2 * (stop - start) / self.factor**level
+        return self.level_points(level, start, stop)
+
+    def level_points(self, level, start, stop):
+        if level == 0:
+            return np.arange(start, stop), self.values[start:stop]
+        size = self.factor**level
+        first = start // size
+        last = min(-(-stop // size), self.counts[level - 1])
+        x_data = np.repeat(np.arange(first, last) * size, 2)
+        y_data = np.empty(len(x_data))
+        y_data[0::2] = self.minima[level - 1][first:last]
+        y_data[1::2] = self.maxima[level - 1][first:last]
+        # Samples after the last complete bucket come from the finer levels.
+        tail = max(last * size, start)
+        if tail < stop:
+            tail_x, tail_y = self.level_points(level - 1, tail, stop)
+            x_data = np.concatenate((x_data, tail_x))
+            y_data = np.concatenate((y_data, tail_y))
+        return x_data, y_data
+
+
+class HistoryIndex:
+    """
+    MinMaxPyramid of every column of the samples of a simulation but time,
+    holding at most the last `limit` samples starting at the time of the
+    first one. Once full, at least half of the oldest samples are dropped at
+    once so that rebuilding the levels is amortized over many samples.
+    """
+
+    def __init__(self, columns, limit=2000000, factor=4):
+        self.columns = columns
+        self.limit = limit
+        self.pyramids = {
+            name: MinMaxPyramid(factor) for name in columns if name != "time"
+        }
+        self.start_time = 0
+        self.count = 0
+
+    def clear(self):
+        for pyramid in self.pyramids.values():
+            pyramid.clear()
+        self.start_time = 0
+        self.count = 0
+
+    def drop(self, count):
+        """Forget the first `count` samples."""
+        for pyramid in self.pyramids.values():
+            pyramid.drop(count)
+        self.start_time += count
+        self.count -= count
+
+    def extend(self, samples):
+        """Index `samples`, dropping the oldest samples beyond the limit."""
+        samples = samples[-self.limit :]
+        if not samples:
+            return
+        excess = self.count + len(samples) - self.limit
+        if excess > 0:
+            self.drop(min(max(excess, self.limit // 2), self.count))
+        if self.count == 0:
+            self.start_time = samples[0][0]
+        data = np.array(samples, dtype=float)
+        for column, name in enumerate(self.columns):
+            if name in self.pyramids:
+                self.pyramids[name].extend(data[:, column])
+        self.count += len(samples)
+
+    def query(self, name, xlim, max_points):
+        """Return at most about `max_points` points of `name` within `xlim`."""
+        x_data, y_data = self.pyramids[name].query(
+            xlim[0] - self.start_time, xlim[1] - self.start_time + 1, max_points
+        )
+        return x_data + self.start_time, y_data
@@ -0,0 +1,162 @@
+"""
+input_sources.py
+Input profiles read in chunks from memory, text files, streams or binary files.
+Version: 1.0.2
+"""
+import os
+import sys
+import queue
+import itertools
+import threading
+
+
+class ArrayInputSource:
+    """Inputs taken in chunks from a sequence already in memory."""
+
+    def __init__(self, values, chunk_size=4096):
+        self.values = values
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    def read(self):
+        """Return the next chunk of inputs, an empty list once exhausted."""
+        chunk = list(self.values[self.position : self.position + self.chunk_size])
+        self.position += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+
+class TextInputSource:
+    """
+    Inputs parsed lazily from the first column of a text file or stream.
+
+    Blank lines and lines starting with # are skipped. A path is opened and
+    closed by the source, an open stream such as sys.stdin is left open.
+    """
+
+    def __init__(self, file, chunk_size=4096):
+        self.owned = isinstance(file, str)
+        self.file = open(file, "r") if self.owned else file
+        self.chunk_size = chunk_size
+        self.line_number = 0
+
+    def read(self):
+        values = list()
+        while not values:
+            lines = list(itertools.islice(self.file, self.chunk_size))
+            if not lines:
+                break
+            for line in lines:
+                self.line_number += 1
+                fields = line.split()
+                if not fields or fields[0].startswith("#"):
+                    continue
+                try:
+                    values.append(float(fields[0]))
+                except ValueError:
+                    raise ValueError(
+                        f"line {self.line_number}: {fields[0]!r} is not a number"
+                    ) from None
+        return values
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+
+
+class StreamInputSource:
+    """
+    Inputs parsed from a stream such as sys.stdin by a reader thread, so that
+    a slow producer never blocks the simulation while it holds a lock.
+
+    `ready` tells whether `read` can return at once, with the values received
+    so far (at most `chunk_size`) or the end of the stream. Otherwise `read`
+    waits for the next value.
+    """
+
+    def __init__(self, file, chunk_size=4096):
+        self.source = TextInputSource(file, chunk_size=1)
+        self.chunk_size = chunk_size
+        self.values = queue.SimpleQueue()
+        self.ended = False
+        self.reader = threading.Thread(target=self.read_stream, daemon=True)
+        self.reader.start()
+
+    def read_stream(self):
+        try:
+            for value in iter(self.source.read, list()):
+                self.values.put(value[0])
+        except ValueError as error:
+            self.values.put(error)
+        self.values.put(None)
+
+    def ready(self):
+        return self.ended or not self.values.empty()
+
+    def read(self):
+        values = list()
+        block = True
+        while not self.ended and len(values) < self.chunk_size:
+            try:
+                value = self.values.get(block)
+            except queue.Empty:
+                break
+            block = False
+            if value is None:
+                self.ended = True
+            elif isinstance(value, ValueError):
+                raise value
+            else:
+                values.append(value)
+        return values
+
+    def close(self):
+        self.ended = True
+
+
+class BinaryInputSource:
+    """
+    Inputs read in chunks from a memory mapped .npy file or a raw file of
+    little endian float64 values. Only the first column of 2D arrays is used.
+    """
+
+    def __init__(self, path, chunk_size=65536):
+        import numpy as np
+
+        if path.endswith(".npy"):
+            data = np.load(path, mmap_mode="r")
+        else:
+            with open(path, "rb") as file_input:
+                empty = len(file_input.read(1)) == 0
+            data = np.zeros(0) if empty else np.memmap(path, dtype="<f8", mode="r")
+        self.data = data[:, 0] if data.ndim > 1 else data
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    def read(self):
+        chunk = self.data[self.position : self.position + self.chunk_size]
+        self.position += len(chunk)
+        return chunk.tolist()
+
+    def close(self):
+        self.data = self.data[:0]
+
+
+def open_input_source(path):
+    """
+    Return the input source for `path` by its extension: .npy and .bin files
+    are memory mapped, - reads from the standard input as it arrives, a
+    directory replays the inputs of a recorded run and any other file is read
+    as text.
+    """
+    if path == "-":
+        return StreamInputSource(sys.stdin)
+    if os.path.isdir(path):
+        from run_recorder import RunInputSource
+
+        return RunInputSource(path)
+    if path.endswith((".npy", ".bin")):
+        return BinaryInputSource(path)
+    return TextInputSource(path)
@@ -0,0 +1,161 @@
+"""
+live_plot.py
+Output and manipulation plots updated in place every sample.
+Version: 1.0.2
+"""
+from matplotlib.spines import Spine
+
+
+class ProcessPlot:
+    """
+    Axes and lines of the simulator figure, created once.
+
+    The horizontal axis shows `window` samples and scrolls `scroll_step`
+    samples at a time. While it does not scroll only the lines are redrawn over
+    a cached background of the axes (blitting), a full redraw is requested
+    with `draw_idle` when it scrolls.
+
+    With `show_history` the plots show the whole run held in a HistoryIndex
+    instead, following its end until the view is panned or zoomed, with a
+    minimum and a maximum per pixel from the matching resolution level.
+    """
+
+    def __init__(self, figure, window=50, scroll_step=None, ylim=(-10, 100), blit=True):
+        self.figure = figure
+        self.window = window
+        self.scroll_step = scroll_step or max(1, window // 5)
+        self.blit = blit
+        self.x_start = 0
+        self.backgrounds = None
+        self.index = None
+        self.follow = True
+        self.setting_xlim = False
+
+        self.output_axes = figure.add_subplot(211)
+        self.input_axes = figure.add_subplot(212)
+        self.style_axes(self.output_axes, "Output", ylim)
+        self.style_axes(self.input_axes, "Noise and Manipulation", ylim)
+
+        (self.output_line,) = self.output_axes.plot([], [], ".-", color="lime")
+        (self.input_line,) = self.input_axes.plot([], [], ".-", color="lime")
+        (self.noise_line,) = self.input_axes.plot([], [], ".-", color="red")
+        self.lines = (
+            (self.output_axes, self.output_line),
+            (self.input_axes, self.input_line),
+            (self.input_axes, self.noise_line),
+        )
+        self.columns = {
+            self.output_line: "output",
+            self.input_line: "input",
+            self.noise_line: "noise",
+        }
+        for ax, line in self.lines:
+            line.set_animated(blit)
+            ax.callbacks.connect("xlim_changed", self.on_xlim_changed)
+
+        self.set_xlim()
+        self.figure.tight_layout()
+        self.figure.canvas.mpl_connect("draw_event", self.on_draw)
+
+    @staticmethod
+    def style_axes(ax, title, ylim):
+        ax.set_facecolor("#252526")
+        for child in ax.get_children():
+            if isinstance(child, Spine):
+                child.set_color("white")
+        ax.tick_params(axis="both", colors="white")
+        ax.set_title(title, color="white")
+        ax.set_ylim(ylim)
+
+    def set_xlim(self, xlim=None):
+        if xlim is None:
+            xlim = (self.x_start - 0.5, self.x_start + self.window + 0.5)
+        self.setting_xlim = True
+        self.output_axes.set_xlim(xlim)
+        self.input_axes.set_xlim(xlim)
+        self.setting_xlim = False
+
+    def on_xlim_changed(self, ax):
+        if self.index is None or self.setting_xlim:
+            return
+        self.follow = False
+        self.load_history(ax)
+
+    def on_draw(self, event):
+        if not self.blit or self.index is not None:
+            return
+        canvas = self.figure.canvas
+        if event.canvas is canvas:
+            self.backgrounds = [
+                canvas.copy_from_bbox(ax.bbox)
+                for ax in (self.output_axes, self.input_axes)
+            ]
+        # Animated lines are left out of full draws, also of saved figures.
+        for _, line in self.lines:
+            line.draw(event.renderer)
+
+    def redraw(self):
+        self.backgrounds = None
+        self.figure.canvas.draw_idle()
+
+    def show_history(self, index):
+        """Show the whole run held in `index`, or the last samples when None."""
+        self.index = index
+        self.follow = True
+        for _, line in self.lines:
+            line.set_animated(self.blit and index is None)
+        if index is None:
+            self.set_xlim()
+        self.redraw()
+
+    def load_history(self, ax):
+        max_points = 2 * max(int(ax.bbox.width), 1)
+        for line_ax, line in self.lines:
+            if line_ax is ax:
+                line.set_data(
+                    *self.index.query(self.columns[line], ax.get_xlim(), max_points)
+                )
+
+    def update(self, history):
+        """Show the output, input and noise samples held in `history`."""
+        if self.index is not None:
+            self.update_history()
+            return
+        samples = history.time
+        x_data = range(samples - len(history.output_data), samples)
+        self.output_line.set_data(x_data, history.output_data.values())
+        self.input_line.set_data(x_data, history.input_data.values())
+        self.noise_line.set_data(x_data, history.noise_data.values())
+
+        last = samples - 1
+        if last > self.x_start + self.window or last < self.x_start:
+            self.x_start = max(last + self.scroll_step - 1 - self.window, 0)
+            self.set_xlim()
+            self.redraw()
+        elif self.backgrounds is None:
+            self.redraw()
+        else:
+            canvas = self.figure.canvas
+            for background in self.backgrounds:
+                canvas.restore_region(background)
+            for ax, line in self.lines:
+                ax.draw_artist(line)
+            canvas.blit(self.output_axes.bbox)
+            canvas.blit(self.input_axes.bbox)
+
+    def update_history(self):
+        index = self.index
+        if self.follow:
+            last = max(index.start_time + index.count - 1, self.window)
+            self.set_xlim((index.start_time - 0.5, last + 0.5))
+        self.load_history(self.output_axes)
+        self.load_history(self.input_axes)
+        self.figure.canvas.draw_idle()
+
+    def clear(self):
+        for _, line in self.lines:
+            line.set_data([], [])
+        self.x_start = 0
+        self.follow = True
+        self.set_xlim()
+        self.redraw()
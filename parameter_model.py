@@ -0,0 +1,107 @@
+"""
+parameter_model.py
+Validated simulation parameters and memoized discretization coefficients.
+Version: 1.0.2
+"""
+import math
+import functools
+from collections import namedtuple
+from process_engine import controller_coefficients, process_coefficients
+
+Coefficients = namedtuple("Coefficients", "a1 b1 b2 n_value q0 q1 q2")
+
+
+@functools.lru_cache(maxsize=256)
+def discretize(
+    gain, tau, theta_prime, period, kc, integral_constant, derivative_constant
+):
+    """Return the process and controller coefficients for a set of parameters."""
+    return Coefficients(
+        *process_coefficients(gain, tau, theta_prime, period),
+        *controller_coefficients(kc, integral_constant, derivative_constant, period),
+    )
+
+
+class ParameterModel:
+    """
+    Parameters of the simulation set from text or numbers as they are edited.
+
+    A value that does not parse, is not finite or is out of range marks its parameter invalid
+    and keeps the last valid one, parameters refused by the simulation can be
+    marked with `reject` until they are accepted again. The coefficients are
+    only looked up again when a process or controller parameter changes.
+    """
+
+    PROCESS = ("gain", "tau", "theta_prime", "period")
+    CONTROLLER = ("kc", "integral_constant", "derivative_constant")
+    POSITIVE = ("gain", "tau", "theta_prime", "period", "integral_constant")
+    DEFAULTS = {
+        "gain": 1.0,
+        "tau": 3.34,
+        "theta_prime": 1.46,
+        "period": 1.0,
+        "kc": 1.957983,
+        "integral_constant": 4.564447,
+        "derivative_constant": 0.476814,
+    }
+
+    def __init__(self, **values):
+        self.values = dict(self.DEFAULTS)
+        self.values.update(values)
+        self.invalid = set()
+        self.rejected = set()
+        self.coefficients = None
+        self.update_coefficients()
+
+    def set(self, name, value):
+        """Set `name` from a number or text, return True if its value changed."""
+        try:
+            value = float(value)
+        except ValueError:
+            self.invalid.add(name)
+            return False
+        if not math.isfinite(value) or name in self.POSITIVE and not value > 0:
+            self.invalid.add(name)
+            return False
+        self.invalid.discard(name)
+        if self.values.get(name) == value:
+            return False
+        self.values[name] = value
+        if name in self.PROCESS or name in self.CONTROLLER:
+            self.update_coefficients()
+        return True
+
+    def reject(self, names):
+        self.rejected.update(names)
+
+    def accept(self, names):
+        self.rejected.difference_update(names)
+
+    def valid(self, *names):
+        """Return True if every parameter in `names` has a valid value."""
+        return all(
+            name in self.values
+            and name not in self.invalid
+            and name not in self.rejected
+            for name in names
+        )
+
+    def update_coefficients(self):
+        values = self.values
+        self.coefficients = discretize(
+            *(values[name] for name in self.PROCESS + self.CONTROLLER)
+        )
+
+    def apply_process(self, process):
+        values = self.values
+        process.set_parameters(
+            *(values[name] for name in self.PROCESS), self.coefficients[:4]
+        )
+
+    def apply_controller(self, controller):
+        values = self.values
+        controller.set_parameters(
+            *(values[name] for name in self.CONTROLLER),
+            values["period"],
+            self.coefficients[4:],
+        )
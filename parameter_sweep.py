@@ -0,0 +1,227 @@
+"""
+parameter_sweep.py
+Parallel parameter sweeps and Monte Carlo runs over the process parameters.
+Version: 1.0.2
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from performance_metrics import StreamingMetrics
+from process_engine import FirstOrderProcess, PIDController, ProcessSimulation
+
+PARAMETERS = ("gain", "tau", "theta_prime", "period")
+METRICS = (
+    "iae",
+    "ise",
+    "itae",
+    "rise_time",
+    "overshoot",
+    "settling_time",
+    "manipulation_variance",
+)
+NOMINAL = {"gain": 1.0, "tau": 3.34, "theta_prime": 1.46, "period": 1.0}
+DEFAULT_SETTINGS = {
+    "duration": 60.0,
+    "open_loop": False,
+    "set_point": 1.0,
+    "magnitude": 1.0,
+    "kc": 1.957983,
+    "integral_constant": 4.564447,
+    "derivative_constant": 0.476814,
+    "disturbance": None,
+    "disturbance_magnitude": 0.1,
+    "seed": None,
+}
+
+
+def draw_value(rng, nominal, spread, distribution):
+    if distribution == "uniform":
+        value = nominal * (1 + rng.uniform(-spread, spread))
+    elif distribution == "normal":
+        value = rng.gauss(nominal, nominal * spread)
+    elif distribution == "lognormal":
+        value = nominal * rng.lognormvariate(0, spread)
+    else:
+        raise ValueError(f"unknown distribution {distribution!r}")
+    return max(value, nominal * 1e-3)
+
+
+def sample_parameters(
+    runs, spread=0.1, distribution="uniform", seed=None, nominal=None, vary=PARAMETERS
+):
+    """Draw `runs` parameter sets around the nominal process parameters."""
+    rng = random.Random(seed)
+    nominal = dict(NOMINAL, **(nominal or {}))
+    samples = list()
+    for _ in range(runs):
+        sample = dict(nominal)
+        for name in vary:
+            sample[name] = draw_value(rng, nominal[name], spread, distribution)
+        samples.append(sample)
+    return samples
+
+
+def grid_parameters(gains, taus, theta_primes, periods):
+    """Return every combination of the given parameter values."""
+    return [
+        dict(zip(PARAMETERS, values))
+        for values in itertools.product(gains, taus, theta_primes, periods)
+    ]
+
+
+def simulate_case(parameters, settings, run=0):
+    """
+    Run one step response and return its parameters and metrics. The
+    disturbance of run `run` is seeded with the settings seed and `run`.
+    """
+    process = FirstOrderProcess(
+        parameters["gain"],
+        parameters["tau"],
+        parameters["theta_prime"],
+        parameters["period"],
+    )
+    controller = PIDController(
+        settings["kc"],
+        settings["integral_constant"],
+        settings["derivative_constant"],
+        process.period,
+    )
+    simulation = ProcessSimulation(process, controller)
+    if settings["disturbance"] is not None:
+        from disturbances import create_disturbance
+
+        seed = None if settings["seed"] is None else [settings["seed"], run]
+        simulation.set_disturbance(
+            create_disturbance(
+                settings["disturbance"], settings["disturbance_magnitude"], seed
+            )
+        )
+    if settings["open_loop"]:
+        simulation.magnitude = settings["magnitude"]
+        target = process.gain * settings["magnitude"]
+    else:
+        simulation.auto_mode = True
+        simulation.set_point = settings["set_point"]
+        target = settings["set_point"]
+
+    metrics = StreamingMetrics()
+    metrics.start(target, 0.0)
+    step = simulation.step
+    for _ in range(int(math.ceil(settings["duration"] / process.period))):
+        metrics.add(step(), target, simulation.sample[1])
+    result = dict(parameters)
+    result.update(metrics.summary(process.period))
+    return result
+
+
+def simulate_batch(batch, settings, first=0):
+    return [
+        simulate_case(parameters, settings, first + index)
+        for index, parameters in enumerate(batch)
+    ]
+
+
+def run_sweep(samples, workers=None, batch_size=None, **settings):
+    """
+    Simulate every parameter set in `samples` on a pool of `workers` processes.
+
+    Parameter sets are sent to the workers in batches of `batch_size` so that
+    every task amortizes its inter process communication over many runs.
+    """
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise TypeError(f"unknown settings: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    workers = workers or os.cpu_count() or 1
+    if batch_size is None:
+        batch_size = max(1, math.ceil(len(samples) / (workers * 4)))
+    starts = range(0, len(samples), batch_size)
+    batches = [samples[start : start + batch_size] for start in starts]
+
+    if workers == 1:
+        results = [
+            simulate_batch(batch, settings, start)
+            for batch, start in zip(batches, starts)
+        ]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(
+                executor.map(
+                    simulate_batch, batches, itertools.repeat(settings), starts
+                )
+            )
+    return [result for batch in results for result in batch]
+
+
+def write_results(results, path):
+    with open(path, "w", newline="") as output:
+        writer = csv.DictWriter(output, fieldnames=PARAMETERS + METRICS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo sweep of the process parameters around nominal."
+    )
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=0.1)
+    parser.add_argument(
+        "--distribution", choices=("uniform", "normal", "lognormal"), default="uniform"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--open-loop", action="store_true")
+    parser.add_argument("--set-point", type=float, default=1.0)
+    parser.add_argument("--magnitude", type=float, default=1.0)
+    parser.add_argument("--kc", type=float, default=1.957983)
+    parser.add_argument("--ti", type=float, default=4.564447)
+    parser.add_argument("--td", type=float, default=0.476814)
+    parser.add_argument(
+        "--disturbance",
+        choices=("white", "colored", "random_walk"),
+        help="disturbance added to the output, seeded per run by --seed",
+    )
+    parser.add_argument("--disturbance-magnitude", type=float, default=0.1)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--output", default="sweep.csv")
+    args = parser.parse_args(argv)
+
+    samples = sample_parameters(args.runs, args.spread, args.distribution, args.seed)
+    start = time.perf_counter()
+    results = run_sweep(
+        samples,
+        args.workers,
+        args.batch_size,
+        duration=args.duration,
+        open_loop=args.open_loop,
+        set_point=args.set_point,
+        magnitude=args.magnitude,
+        kc=args.kc,
+        integral_constant=args.ti,
+        derivative_constant=args.td,
+        disturbance=args.disturbance,
+        disturbance_magnitude=args.disturbance_magnitude,
+        seed=args.seed,
+    )
+    elapsed = time.perf_counter() - start
+    write_results(results, args.output)
+
+    print(f"{len(results)} runs in {elapsed:.2f} s")
+    for metric in METRICS:
+        values = sorted(result[metric] for result in results)
+        if values:
+            print(
+                f"{metric}: median {values[len(values) // 2]:.3f}"
+                f" worst {values[-1]:.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
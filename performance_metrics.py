@@ -0,0 +1,211 @@
+"""
+performance_metrics.py
+Control performance metrics of a simulated response.
+Version: 1.0.2
+"""
+import math
+
+
+def integral_errors(outputs, set_point, period):
+    """Return the (IAE, ISE, ITAE) of `outputs` against a constant set point."""
+    iae = 0.0
+    ise = 0.0
+    itae = 0.0
+    for k, output in enumerate(outputs):
+        error = set_point - output
+        iae += abs(error)
+        ise += error * error
+        itae += k * period * abs(error)
+    return iae * period, ise * period, itae * period
+
+
+def overshoot(outputs, set_point, initial=0.0):
+    """Return the overshoot in percent of the change from `initial` to `set_point`."""
+    change = set_point - initial
+    if change == 0 or len(outputs) == 0:
+        return 0.0
+    if change > 0:
+        peak = max(outputs) - set_point
+    else:
+        peak = set_point - min(outputs)
+    return max(peak, 0.0) / abs(change) * 100
+
+
+def rise_time(outputs, set_point, period, initial=0.0, low=0.1, high=0.9):
+    """
+    Return the time `outputs` takes to go from `low` to `high` of the change
+    from `initial` to `set_point`, infinity if it does not get there.
+    """
+    change = set_point - initial
+    if change == 0:
+        return 0.0
+    start = None
+    for k, output in enumerate(outputs):
+        progress = (output - initial) / change
+        if start is None and progress >= low:
+            start = k
+        if start is not None and progress >= high:
+            return (k - start) * period
+    return math.inf
+
+
+def settling_time(outputs, set_point, period, initial=0.0, band=0.02):
+    """
+    Return the time after which `outputs` stays within `band` of the change.
+
+    Responses that are outside of the band at the last sample never settle and
+    return infinity.
+    """
+    tolerance = band * abs(set_point - initial)
+    for k in range(len(outputs) - 1, -1, -1):
+        if abs(set_point - outputs[k]) > tolerance:
+            if k == len(outputs) - 1:
+                return math.inf
+            return (k + 1) * period
+    return 0.0
+
+
+def step_metrics(outputs, set_point, period, initial=0.0, band=0.02):
+    iae, ise, itae = integral_errors(outputs, set_point, period)
+    return {
+        "iae": iae,
+        "ise": ise,
+        "itae": itae,
+        "rise_time": rise_time(outputs, set_point, period, initial),
+        "overshoot": overshoot(outputs, set_point, initial),
+        "settling_time": settling_time(outputs, set_point, period, initial, band),
+    }
+
+
+def array_metrics(
+    outputs, set_point, period, initial=0.0, band=0.02, manipulation=None
+):
+    """
+    Return the step_metrics of an array of outputs, and the variance of the
+    `manipulation` array when given, evaluated with numpy array operations.
+    """
+    import numpy as np
+
+    outputs = np.asarray(outputs, dtype=float)
+    errors = set_point - outputs
+    absolute = np.abs(errors)
+    change = set_point - initial
+    rise = 0.0
+    peak = 0.0
+    if change != 0 and len(outputs) > 0:
+        progress = (outputs - initial) / change
+        low = np.flatnonzero(progress >= 0.1)
+        high = np.flatnonzero(progress >= 0.9)
+        rise = (high[0] - low[0]) * period if len(high) > 0 else math.inf
+        peak = max(progress.max() - 1, 0.0)
+    outside = np.flatnonzero(absolute > band * abs(change))
+    if len(outside) == 0:
+        settling = 0.0
+    elif outside[-1] == len(outputs) - 1:
+        settling = math.inf
+    else:
+        settling = (outside[-1] + 1) * period
+    metrics = {
+        "iae": float(absolute.sum()) * period,
+        "ise": float(errors @ errors) * period,
+        "itae": float(np.arange(len(outputs)) @ absolute) * period * period,
+        "rise_time": float(rise),
+        "overshoot": float(peak) * 100,
+        "settling_time": float(settling),
+    }
+    if manipulation is not None:
+        manipulation = np.asarray(manipulation, dtype=float)
+        metrics["manipulation_variance"] = (
+            float(manipulation.var(ddof=1)) if len(manipulation) > 1 else 0.0
+        )
+    return metrics
+
+
+class StreamingMetrics:
+    """
+    The metrics of step_metrics and the variance of the manipulation m(k),
+    updated in constant time with every sample added.
+
+    A step starts whenever the set point changes, from the last output added,
+    and the metrics cover the samples since. Sums are kept per sample and
+    scaled by the period given to `summary`.
+    """
+
+    def __init__(self, band=0.02, low=0.1, high=0.9):
+        self.band = band
+        self.low = low
+        self.high = high
+        self.output = 0.0
+        self.start(None)
+
+    def reset(self):
+        self.output = 0.0
+        self.start(None)
+
+    def start(self, set_point, initial=None):
+        """Start a new step to `set_point` from `initial`, the last output if None."""
+        self.set_point = set_point
+        self.initial = self.output if initial is None else initial
+        self.samples = 0
+        self.absolute_sum = 0.0
+        self.square_sum = 0.0
+        self.weighted_sum = 0.0
+        self.peak = 0.0
+        self.low_sample = None
+        self.high_sample = None
+        self.last_outside = -1
+        self.mean = 0.0
+        self.deviations = 0.0
+
+    def add(self, output, set_point, manipulation):
+        if set_point != self.set_point:
+            self.start(set_point)
+        k = self.samples
+        error = set_point - output
+        absolute = abs(error)
+        self.absolute_sum += absolute
+        self.square_sum += error * error
+        self.weighted_sum += k * absolute
+
+        change = set_point - self.initial
+        if change != 0:
+            progress = (output - self.initial) / change
+            self.peak = max(self.peak, progress - 1)
+            if self.low_sample is None and progress >= self.low:
+                self.low_sample = k
+            if self.high_sample is None and progress >= self.high:
+                self.high_sample = k
+        if absolute > self.band * abs(change):
+            self.last_outside = k
+
+        # Welford's update of the mean and squared deviations of m(k).
+        delta = manipulation - self.mean
+        self.mean += delta / (k + 1)
+        self.deviations += delta * (manipulation - self.mean)
+
+        self.samples = k + 1
+        self.output = output
+
+    def summary(self, period=1.0):
+        samples = self.samples
+        if self.set_point == self.initial or samples == 0:
+            rise = 0.0
+        elif self.low_sample is None or self.high_sample is None:
+            rise = math.inf
+        else:
+            rise = (self.high_sample - self.low_sample) * period
+        if self.last_outside == samples - 1 and samples > 0:
+            settling = math.inf
+        else:
+            settling = (self.last_outside + 1) * period
+        return {
+            "iae": self.absolute_sum * period,
+            "ise": self.square_sum * period,
+            "itae": self.weighted_sum * period * period,
+            "rise_time": rise,
+            "overshoot": self.peak * 100,
+            "settling_time": settling,
+            "manipulation_variance": (
+                self.deviations / (samples - 1) if samples > 1 else 0.0
+            ),
+        }
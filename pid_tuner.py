@@ -0,0 +1,231 @@
+"""
+pid_tuner.py
+PID tuning by minimizing the IAE, ISE or ITAE of a simulated set point step.
+Version: 1.0.2
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from parameter_sweep import DEFAULT_SETTINGS, simulate_case
+
+CRITERIA = ("iae", "ise", "itae")
+DEFAULT_TUNING = (1.957983, 4.564447, 0.476814)
+
+
+def tuning_bounds(gain, tau, theta_prime):
+    """Search bounds for (Kc, tau_i, tau_d) scaled by the process parameters."""
+    ratio = tau / (gain * theta_prime)
+    return (
+        (0.05 * ratio, 3 * ratio),
+        (0.1 * tau, 2 * (tau + theta_prime)),
+        (0.0, theta_prime),
+    )
+
+
+def tuning_cost(tuning, parameters, criterion, duration):
+    settings = dict(
+        DEFAULT_SETTINGS,
+        duration=duration,
+        kc=tuning[0],
+        integral_constant=tuning[1],
+        derivative_constant=tuning[2],
+    )
+    cost = simulate_case(parameters, settings)[criterion]
+    return cost if cost == cost else math.inf
+
+
+def evaluate_batch(batch, parameters, criterion, duration):
+    return [tuning_cost(tuning, parameters, criterion, duration) for tuning in batch]
+
+
+class TuningCache:
+    """Tuning results by process and criterion, optionally persisted to JSON."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.results = dict()
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as cache_file:
+                self.results = json.load(cache_file)
+
+    @staticmethod
+    def key(parameters, criterion, duration):
+        return json.dumps(
+            [
+                parameters["gain"],
+                parameters["tau"],
+                parameters["theta_prime"],
+                parameters["period"],
+                criterion,
+                duration,
+            ]
+        )
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        self.results[key] = result
+        if self.path is not None:
+            with open(self.path, "w") as cache_file:
+                json.dump(self.results, cache_file, indent=1)
+
+
+default_cache = TuningCache()
+
+
+def tune_pid(
+    gain=1.0,
+    tau=3.34,
+    theta_prime=1.46,
+    period=1.0,
+    criterion="iae",
+    duration=None,
+    population=20,
+    generations=30,
+    seed=0,
+    workers=1,
+    cache=default_cache,
+):
+    """
+    Return the PID tuning minimizing `criterion` for a unit set point step.
+
+    The search is a differential evolution over (Kc, tau_i, tau_d) seeded with
+    the default tuning, every generation is evaluated on `workers` processes.
+    Results are stored in `cache` and returned directly for processes that
+    were already tuned, pass cache=None to always search.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"criterion must be one of {', '.join(CRITERIA)}")
+    if gain <= 0 or tau <= 0 or theta_prime <= 0 or period <= 0:
+        raise ValueError("gain, tau, theta_prime and period must be positive")
+    if population < 4:
+        raise ValueError("population must be at least 4")
+    parameters = {
+        "gain": gain,
+        "tau": tau,
+        "theta_prime": theta_prime,
+        "period": period,
+    }
+    if duration is None:
+        duration = max(20 * (tau + theta_prime), 50 * period)
+    key = TuningCache.key(parameters, criterion, duration)
+    if cache is not None and cache.get(key) is not None:
+        return dict(cache.get(key))
+
+    rng = random.Random(seed)
+    bounds = tuning_bounds(gain, tau, theta_prime)
+    candidates = [
+        tuple(
+            min(max(value, low), high)
+            for value, (low, high) in zip(DEFAULT_TUNING, bounds)
+        )
+    ]
+    while len(candidates) < population:
+        candidates.append(tuple(rng.uniform(low, high) for low, high in bounds))
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    batch_size = max(1, math.ceil(population / workers))
+
+    def evaluate(tunings):
+        batches = [
+            tunings[start : start + batch_size]
+            for start in range(0, len(tunings), batch_size)
+        ]
+        arguments = (
+            batches,
+            itertools.repeat(parameters),
+            itertools.repeat(criterion),
+            itertools.repeat(duration),
+        )
+        if executor is None:
+            results = map(evaluate_batch, *arguments)
+        else:
+            results = executor.map(evaluate_batch, *arguments)
+        return [cost for batch in results for cost in batch]
+
+    try:
+        costs = evaluate(candidates)
+        for _ in range(generations):
+            trials = list()
+            for index, target in enumerate(candidates):
+                a, b, c = rng.sample(
+                    [other for other in range(population) if other != index], 3
+                )
+                forced = rng.randrange(3)
+                trial = list()
+                for dim, (low, high) in enumerate(bounds):
+                    if dim == forced or rng.random() < 0.9:
+                        value = candidates[a][dim] + 0.7 * (
+                            candidates[b][dim] - candidates[c][dim]
+                        )
+                        value = min(max(value, low), high)
+                    else:
+                        value = target[dim]
+                    trial.append(value)
+                trials.append(tuple(trial))
+
+            for index, cost in enumerate(evaluate(trials)):
+                if cost <= costs[index]:
+                    candidates[index] = trials[index]
+                    costs[index] = cost
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = min(range(population), key=costs.__getitem__)
+    result = {
+        "kc": candidates[best][0],
+        "integral_constant": candidates[best][1],
+        "derivative_constant": candidates[best][2],
+        "cost": costs[best],
+    }
+    if cache is not None:
+        cache.put(key, result)
+    return dict(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Tune Kc, tau_i and tau_d for a first order plus dead time process."
+    )
+    parser.add_argument("--gain", type=float, default=1.0)
+    parser.add_argument("--tau", type=float, default=3.34)
+    parser.add_argument("--theta-prime", type=float, default=1.46)
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument("--criterion", choices=CRITERIA, default="iae")
+    parser.add_argument("--duration", type=float)
+    parser.add_argument("--population", type=int, default=20)
+    parser.add_argument("--generations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache", help="JSON file with previous tuning results")
+    args = parser.parse_args(argv)
+    if args.population < 4:
+        parser.error("--population must be at least 4")
+
+    result = tune_pid(
+        args.gain,
+        args.tau,
+        args.theta_prime,
+        args.period,
+        args.criterion,
+        args.duration,
+        args.population,
+        args.generations,
+        args.seed,
+        args.workers,
+        TuningCache(args.cache),
+    )
+    print(f"Kc = {result['kc']:.6f}")
+    print(f"Integral Time Constant = {result['integral_constant']:.6f}")
+    print(f"Derivative Time Constant = {result['derivative_constant']:.6f}")
+    print(f"{args.criterion.upper()} = {result['cost']:.6f}")
+
+
+if __name__ == "__main__":
+    main()
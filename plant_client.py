@@ -0,0 +1,120 @@
+"""
+plant_client.py
+Client of the plant server and a stand-in external PID controller.
+Version: 1.0.2
+"""
+import json
+import socket
+import argparse
+from performance_metrics import step_metrics
+from process_engine import PIDController
+
+
+class PlantClient:
+    """
+    Blocking client of one plant session of plant_server.PlantServer.
+
+    `address` is a (host, port) pair for TCP or the path of a Unix socket.
+    """
+
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.connect(address)
+        self.reader = self.socket.makefile("rb")
+        self.period = None
+
+    def request(self, op, **fields):
+        fields["op"] = op
+        self.socket.sendall(json.dumps(fields).encode() + b"\n")
+        reply = json.loads(self.reader.readline())
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply
+
+    def open(self, model="first_order", speed=None, **parameters):
+        """
+        Start a new plant `model` with the keyword `parameters`, at `speed` or
+        "max", or at the speed of the server when None.
+        """
+        fields = {"model": model, "parameters": parameters}
+        if speed is not None:
+            fields["speed"] = speed
+        reply = self.request("open", **fields)
+        self.period = reply["period"]
+        return reply
+
+    def step(self, values):
+        """Apply the inputs m(k) of `values` in order and return the outputs c(k)."""
+        return self.request("step", m=list(values))["c"]
+
+    def reset(self):
+        self.request("reset")
+
+    def close(self):
+        try:
+            self.request("close")
+        except (OSError, ValueError):
+            pass
+        self.reader.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_controller(client, controller, set_point, steps):
+    """
+    Control the plant of `client` with `controller` to `set_point` for `steps`
+    samples, as the auto mode of ProcessSimulation does, and return the outputs.
+    """
+    outputs = list()
+    value = controller.m_k
+    for _ in range(steps):
+        (output,) = client.step([value])
+        value = controller.update(set_point, output, value)
+        outputs.append(output)
+    return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Control a served plant with a PID controller."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket")
+    parser.add_argument("--model", default="first_order")
+    parser.add_argument(
+        "--parameters", default="{}", help='plant parameters as JSON, e.g. {"gain": 2}'
+    )
+    parser.add_argument(
+        "--speed",
+        type=lambda text: text if text == "max" else float(text),
+        help="simulated time per wall time or max, the server speed by default",
+    )
+    parser.add_argument("--kc", type=float, default=1.957983)
+    parser.add_argument("--ti", type=float, default=4.564447)
+    parser.add_argument("--td", type=float, default=0.476814)
+    parser.add_argument("--set-point", type=float, default=1.0)
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    address = args.unix if args.unix else (args.host, args.port)
+    with PlantClient(address) as client:
+        client.open(args.model, args.speed, **json.loads(args.parameters))
+        controller = PIDController(args.kc, args.ti, args.td, client.period)
+        outputs = run_controller(client, controller, args.set_point, args.steps)
+    metrics = step_metrics(outputs, args.set_point, client.period)
+    for name, value in metrics.items():
+        print(f"{name}: {value:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+plant_server.py
+Simulated plants served over TCP or Unix sockets to external controllers.
+Version: 1.0.2
+"""
+import json
+import math
+import asyncio
+import argparse
+from process_engine import FirstOrderProcess
+from process_models import (
+    IntegratingProcess,
+    SecondOrderProcess,
+    StateSpaceProcess,
+    TransferFunctionProcess,
+)
+from simulation_clock import SimulationClock
+
+PLANTS = {
+    "first_order": FirstOrderProcess,
+    "second_order": SecondOrderProcess,
+    "integrating": IntegratingProcess,
+    "transfer_function": TransferFunctionProcess,
+    "state_space": StateSpaceProcess,
+}
+
+LINE_LIMIT = 2**24
+CHUNK_SIZE = 4096
+
+
+def create_plant(model="first_order", parameters=None):
+    """Return the plant `model` of PLANTS built with the keyword `parameters`."""
+    if model not in PLANTS:
+        raise ValueError(f"unknown model {model}, expected one of {', '.join(PLANTS)}")
+    return PLANTS[model](**(parameters or dict()))
+
+
+def check_speed(speed):
+    """Raise ValueError unless `speed` is a positive finite number."""
+    if (
+        isinstance(speed, bool)
+        or not isinstance(speed, (int, float))
+        or not math.isfinite(speed)
+        or speed <= 0
+    ):
+        raise ValueError(f"speed must be a positive number or max, not {speed!r}")
+
+
+class PlantSession:
+    """
+    Plant stepped for one connection. With a `speed` the outputs of a batch
+    are returned once the last of its samples is due on the session clock,
+    `speed` times faster than real time, otherwise as soon as computed. Long
+    batches yield to the other sessions every CHUNK_SIZE samples.
+    """
+
+    def __init__(self, plant, speed=None):
+        self.plant = plant
+        self.clock = SimulationClock(period=plant.period, speed=speed)
+
+    @property
+    def time(self):
+        return self.clock.steps
+
+    async def step(self, values):
+        delay = self.clock.advance(len(values))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        step = self.plant.step
+        outputs = list()
+        for start in range(0, len(values), CHUNK_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            outputs.extend(
+                step(float(value)) for value in values[start : start + CHUNK_SIZE]
+            )
+        return outputs
+
+    def reset(self):
+        self.plant.reset()
+        self.clock.reset()
+
+
+class PlantServer:
+    """
+    asyncio server giving every connection its own plant session.
+
+    Requests and replies are JSON objects, one per line:
+
+        {"op": "open", "model": "first_order", "parameters": {...}, "speed": 1.0}
+            -> {"session": 0, "period": 1.0, "time": 0}
+        {"op": "step", "m": [m(k), m(k + 1), ...]}
+            -> {"time": k, "c": [c(k), c(k + 1), ...]}
+        {"op": "reset"} -> {"time": 0}
+        {"op": "close"} -> {}
+
+    The speed of a session is the server `speed` unless the open request
+    gives one, "max" to run as fast as possible. Outputs that are not finite,
+    as those of a diverging plant, are null. A request that fails is
+    answered with {"error": message} and the connection stays open.
+    """
+
+    def __init__(self, speed=None):
+        self.speed = speed
+        self.sessions = dict()
+        self.connections = 0
+        self.server = None
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        """Listen on `host` and `port`, return the address actually bound."""
+        self.server = await asyncio.start_server(
+            self.handle, host, port, limit=LINE_LIMIT
+        )
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path):
+        self.server = await asyncio.start_unix_server(
+            self.handle, path, limit=LINE_LIMIT
+        )
+        return path
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle(self, reader, writer):
+        connection = self.connections
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                op = None
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                    reply = await self.dispatch(connection, op, request)
+                    data = json.dumps(reply, allow_nan=False)
+                except (ValueError, TypeError, KeyError, AttributeError) as error:
+                    data = json.dumps({"error": str(error)})
+                writer.write(data.encode() + b"\n")
+                await writer.drain()
+                if op == "close":
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.pop(connection, None)
+            writer.close()
+
+    async def dispatch(self, connection, op, request):
+        if op == "open":
+            plant = create_plant(
+                request.get("model", "first_order"), request.get("parameters")
+            )
+            speed = request.get("speed")
+            if speed is None:
+                speed = self.speed
+            elif speed != "max":
+                check_speed(speed)
+            session = PlantSession(plant, None if speed == "max" else speed)
+            self.sessions[connection] = session
+            return {"session": connection, "period": plant.period, "time": 0}
+        if op == "close":
+            self.sessions.pop(connection, None)
+            return dict()
+        session = self.sessions.get(connection)
+        if session is None:
+            raise ValueError("no plant is open, send an open request first")
+        if op == "step":
+            values = request["m"]
+            if not isinstance(values, list):
+                values = [values]
+            time = session.time
+            outputs = await session.step(values)
+            return {
+                "time": time,
+                "c": [value if math.isfinite(value) else None for value in outputs],
+            }
+        if op == "reset":
+            session.reset()
+            return {"time": 0}
+        raise ValueError(f"unknown op {op}")
+
+
+async def serve(server, host, port, path):
+    if path is not None:
+        address = await server.start_unix(path)
+    else:
+        address = await server.start_tcp(host, port)
+    print(f"serving plants on {address}")
+    await server.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve simulated plants to external controllers."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument(
+        "--speed",
+        type=lambda text: None if text == "max" else float(text),
+        default=None,
+        help="simulated time per wall time of the sessions, max by default",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(PlantServer(args.speed), args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
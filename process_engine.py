@@ -0,0 +1,379 @@
+"""
+process_engine.py
+Headless first order plus dead time process and PID controller engine.
+Version: 1.0.2
+"""
+import math
+import pickle
+from history_buffer import RingBuffer
+from input_sources import ArrayInputSource
+
+
+def process_coefficients(gain, tau, theta_prime, period):
+    """Return a1, b1, b2 and the dead time N in samples of the discretized process."""
+    n_value = int(theta_prime / period)
+    theta = theta_prime - n_value * period
+    m = 1 - theta / period
+    a1 = math.exp((-period) / tau)
+    b1 = gain * (1 - math.exp((-m * period) / tau))
+    b2 = gain * (math.exp((-m * period) / tau) - math.exp((-period) / tau))
+    return a1, b1, b2, n_value
+
+
+def controller_coefficients(kc, integral_constant, derivative_constant, period):
+    """Return q0, q1 and q2 of the PID controller in velocity form."""
+    q0 = kc * (1 + period / integral_constant + derivative_constant / period)
+    q1 = kc * (-1 - 2 * derivative_constant / period)
+    q2 = kc * derivative_constant / period
+    return q0, q1, q2
+
+
+class Plant:
+    """
+    Discrete time process advanced one sample at a time.
+
+    `step(value)` applies the input m(k) and returns the response c(k), which
+    is also kept in `output`, and `time` counts the samples taken since
+    `reset`. Implementations set `period` and define `reset` and `step`, and
+    may replace `simulate` with a faster batch evaluation.
+    """
+
+    def simulate(self, inputs):
+        """Return the responses to `inputs` applied from rest, then reset."""
+        self.reset()
+        outputs = [self.step(value) for value in inputs]
+        self.reset()
+        return outputs
+
+
+class FirstOrderProcess(Plant):
+    """
+    First order plus dead time process discretized with a zero order hold.
+
+    Past inputs are kept in a ring buffer of `delay_depth` samples, grown
+    when a dead time N + 2 does not fit in it. Until the grown buffer fills
+    up, inputs from before it grew that it no longer held read as the oldest
+    input held.
+    """
+
+    def __init__(
+        self, gain=1.0, tau=3.34, theta_prime=1.46, period=1.0, delay_depth=256
+    ):
+        self.delay_depth = delay_depth
+        self.input_data = RingBuffer(delay_depth)
+        self.n_value = 0
+        self.a1 = 0
+        self.b1 = 0
+        self.b2 = 0
+        self.set_parameters(gain, tau, theta_prime, period)
+        self.reset()
+
+    def set_parameters(self, gain, tau, theta_prime, period, coefficients=None):
+        """
+        Set the process parameters, `coefficients` are the a1, b1, b2 and N
+        already computed for them by process_coefficients, if known.
+        """
+        if gain <= 0 or tau <= 0 or theta_prime <= 0 or period <= 0:
+            raise ValueError("gain, tau, theta_prime and period must be positive")
+        n_value = int(theta_prime / period) if coefficients is None else coefficients[3]
+        if n_value + 2 > self.delay_depth:
+            self.delay_depth = max(2 * self.delay_depth, n_value + 2)
+            self.input_data.resize(self.delay_depth)
+        self.gain = gain
+        self.tau = tau
+        self.theta_prime = theta_prime
+        self.period = period
+        if coefficients is None:
+            self.calculate_parameters()
+        else:
+            self.a1, self.b1, self.b2, self.n_value = coefficients
+
+    def calculate_parameters(self):
+        self.a1, self.b1, self.b2, self.n_value = process_coefficients(
+            self.gain, self.tau, self.theta_prime, self.period
+        )
+
+    def reset(self):
+        self.time = 0
+        self.input_data = RingBuffer(self.delay_depth)
+        self.output = 0.0
+
+    def step(self, value):
+        """Apply the input m(k) and return the process response c(k)."""
+        t = self.time
+        n_value = self.n_value
+        inputs = self.input_data
+        inputs.append(value)
+        # Inputs older than the delay line held before it grew read as the
+        # oldest one held.
+        first = inputs.first
+        if t - n_value - 2 > -1:
+            self.output = (
+                self.a1 * self.output
+                + self.b1 * inputs.at(max(t - n_value, first))
+                + self.b2 * inputs.at(max(t - n_value - 1, first))
+            )
+        elif t - n_value - 1 > -1:
+            self.output = self.a1 * self.output + self.b1 * inputs.at(
+                max(t - n_value, first)
+            )
+        elif t > 0:
+            self.output = self.a1 * self.output
+        else:
+            self.output = 0.0
+        self.time = t + 1
+        return self.output
+
+    def simulate(self, inputs):
+        from batch_simulation import simulate_open_loop
+
+        return simulate_open_loop(inputs, self)[0]
+
+
+class PIDController:
+    """PID controller in velocity form with q0, q1 and q2 coefficients."""
+
+    def __init__(
+        self,
+        kc=1.957983,
+        integral_constant=4.564447,
+        derivative_constant=0.476814,
+        period=1.0,
+    ):
+        self.q0 = 0
+        self.q1 = 0
+        self.q2 = 0
+        self.set_parameters(kc, integral_constant, derivative_constant, period)
+        self.reset()
+
+    def set_parameters(
+        self, kc, integral_constant, derivative_constant, period, coefficients=None
+    ):
+        """
+        Set the tuning, `coefficients` are the q0, q1 and q2 already computed
+        for it by controller_coefficients, if known.
+        """
+        if integral_constant <= 0 or period <= 0:
+            raise ValueError("integral_constant and period must be positive")
+        self.kc = kc
+        self.integral_constant = integral_constant
+        self.derivative_constant = derivative_constant
+        self.period = period
+        if coefficients is None:
+            self.calculate_parameters()
+        else:
+            self.q0, self.q1, self.q2 = coefficients
+
+    def calculate_parameters(self):
+        self.q0, self.q1, self.q2 = controller_coefficients(
+            self.kc, self.integral_constant, self.derivative_constant, self.period
+        )
+
+    def reset(self):
+        self.e_k0 = 0
+        self.e_k1 = 0
+        self.e_k2 = 0
+        self.m_k = 0
+
+    def update(self, set_point, output, last_input):
+        """Return the next manipulation m(k) given the last applied input."""
+        self.e_k2 = self.e_k1
+        self.e_k1 = self.e_k0
+        self.e_k0 = set_point - output
+        self.m_k = (
+            last_input
+            + self.q0 * self.e_k0
+            + self.q1 * self.e_k1
+            + self.q2 * self.e_k2
+        )
+        return self.m_k
+
+
+class ProcessSimulation:
+    """
+    Closed or open loop simulation advanced one sample at a time.
+
+    In manual mode the process input is the step magnitude (or the input source
+    being played back) and the set point tracks the output, in auto mode the
+    input is the controller manipulation m(k).
+
+    Only the last `history_size` samples are kept in memory. The last sample
+    is also kept in `sample` as a tuple in the order of COLUMNS and passed to
+    `sink.record` when a sink is given.
+
+    `metrics`, a StreamingMetrics of performance_metrics when given, is
+    updated with every sample and summarized by `performance`.
+
+    `disturbance`, when set with `set_disturbance`, is read in chunks like the
+    input sources and its samples are added to the constant `noise`.
+
+    `snapshot` pickles the complete state of the simulation, its process and
+    controller, apart from the sink and input sources reading files, and
+    `restore` continues from such a snapshot. Only restore trusted snapshots.
+    """
+
+    COLUMNS = ("time", "input", "system", "output", "noise", "set_point")
+
+    def __init__(
+        self, process=None, controller=None, history_size=50, sink=None, metrics=None
+    ):
+        self.process = process if process is not None else FirstOrderProcess()
+        if controller is None:
+            controller = PIDController(period=self.process.period)
+        self.controller = controller
+        self.history_size = history_size
+        self.sink = sink
+        self.metrics = metrics
+
+        self.auto_mode = False
+        self.magnitude = 0.0
+        self.set_point = 0.0
+        self.noise = 0.0
+        self.input_source = None
+        self.chunk = list()
+        self.chunk_index = 0
+        self.profile_index = 0
+        self.profile_exhausted = False
+        self.disturbance = None
+        self.disturbance_chunk = list()
+        self.disturbance_index = 0
+        self.reset()
+
+    def reset(self):
+        self.time = 0
+        self.sample = None
+        self.time_data = RingBuffer(self.history_size, "q")
+        self.input_data = RingBuffer(self.history_size)
+        self.output_data = RingBuffer(self.history_size)
+        self.system_data = RingBuffer(self.history_size)
+        self.noise_data = RingBuffer(self.history_size)
+        self.process.reset()
+        self.controller.reset()
+        if self.metrics is not None:
+            self.metrics.reset()
+        if self.disturbance is not None:
+            self.set_disturbance(self.disturbance)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["sink"] = None
+        if not isinstance(self.input_source, ArrayInputSource):
+            state["input_source"] = None
+            state["chunk"] = list()
+            state["chunk_index"] = 0
+        return state
+
+    def snapshot(self):
+        """Return the state of the simulation as bytes."""
+        return pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def from_snapshot(snapshot):
+        """Return a new simulation continuing from `snapshot`."""
+        return pickle.loads(snapshot)
+
+    def restore(self, snapshot):
+        """Continue from `snapshot`, keeping the current sink."""
+        state = self.from_snapshot(snapshot).__dict__
+        self.set_input_profile(None)
+        state["sink"] = self.sink
+        self.__dict__.update(state)
+
+    def set_input_profile(self, values):
+        """
+        Play back `values` as the manual input starting with the next sample.
+
+        `values` is a sequence or an input source with a `read` method
+        returning the next chunk of inputs. The simulation closes the source
+        once it is exhausted or replaced. When exhausted the last input is held
+        as the step magnitude and `profile_exhausted` is set.
+        """
+        if self.input_source is not None:
+            self.input_source.close()
+        if values is not None and not hasattr(values, "read"):
+            values = ArrayInputSource(values)
+        self.input_source = values
+        self.chunk = list()
+        self.chunk_index = 0
+        self.profile_index = 0
+        self.profile_exhausted = False
+
+    def set_disturbance(self, disturbance):
+        """Add the samples of `disturbance` to the output from its first one."""
+        if disturbance is not None:
+            disturbance.reset()
+        self.disturbance = disturbance
+        self.disturbance_chunk = list()
+        self.disturbance_index = 0
+
+    def next_disturbance(self):
+        if self.disturbance_index == len(self.disturbance_chunk):
+            self.disturbance_chunk = self.disturbance.read()
+            self.disturbance_index = 0
+        value = self.disturbance_chunk[self.disturbance_index]
+        self.disturbance_index += 1
+        return value
+
+    def input_ready(self):
+        """Return False while the next input waits for a stream to provide it."""
+        source = self.input_source
+        return (
+            self.auto_mode
+            or source is None
+            or self.chunk_index < len(self.chunk)
+            or not hasattr(source, "ready")
+            or source.ready()
+        )
+
+    def next_input(self):
+        if self.auto_mode:
+            return self.controller.m_k
+        if self.input_source is not None:
+            if self.chunk_index == len(self.chunk):
+                chunk = self.input_source.read()
+                if len(chunk) == 0:
+                    if len(self.chunk) > 0:
+                        self.magnitude = self.chunk[-1]
+                    self.set_input_profile(None)
+                    self.profile_exhausted = True
+                    return self.magnitude
+                self.chunk = chunk
+                self.chunk_index = 0
+            value = self.chunk[self.chunk_index]
+            self.chunk_index += 1
+            self.profile_index += 1
+            return value
+        return self.magnitude
+
+    def step(self):
+        value = self.next_input()
+        system = self.process.step(value)
+        noise = self.noise
+        if self.disturbance is not None:
+            noise += self.next_disturbance()
+        output = system + noise
+        if not self.auto_mode:
+            self.set_point = output
+        self.controller.update(self.set_point, output, value)
+        if self.metrics is not None:
+            self.metrics.add(output, self.set_point, value)
+
+        self.time_data.append(self.time)
+        self.input_data.append(value)
+        self.system_data.append(system)
+        self.output_data.append(output)
+        self.noise_data.append(noise)
+        self.sample = (self.time, value, system, output, noise, self.set_point)
+        if self.sink is not None:
+            self.sink.record(self.sample)
+        self.time += 1
+        return output
+
+    def performance(self):
+        """Return the metrics of the response since the last set point change."""
+        return self.metrics.summary(self.process.period)
+
+    def run(self, n_steps):
+        """Advance `n_steps` samples and return their outputs c(k)."""
+        step = self.step
+        return [step() for _ in range(n_steps)]
@@ -0,0 +1,270 @@
+"""
+process_models.py
+Discrete state space, transfer function and higher order dead time processes.
+Version: 1.0.2
+"""
+import math
+import numpy as np
+from history_buffer import RingBuffer
+from process_engine import Plant
+
+try:
+    from scipy.linalg import expm
+except ImportError:
+    expm = None
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+BLOCK_SIZE = 256
+
+
+def matrix_exponential(matrix):
+    """Return e ** matrix by scaling and squaring a truncated Taylor series."""
+    matrix = np.asarray(matrix, dtype=float)
+    if expm is not None:
+        return expm(matrix)
+    norm = np.abs(matrix).sum(axis=1).max() if matrix.size else 0.0
+    squarings = max(0, int(math.ceil(math.log2(norm / 0.5)))) if norm > 0.5 else 0
+    scaled = matrix / 2**squarings
+    result = np.eye(len(matrix))
+    term = np.eye(len(matrix))
+    for order in range(1, 20):
+        term = term @ scaled / order
+        result = result + term
+    for _ in range(squarings):
+        result = result @ result
+    return result
+
+
+def transfer_function_to_state_space(numerator, denominator):
+    """
+    Return the controllable canonical (A, B, C, D) realization of the
+    discrete transfer function numerator / denominator, with coefficients of
+    ascending powers of z^-1.
+    """
+    numerator = np.atleast_1d(np.asarray(numerator, dtype=float))
+    denominator = np.atleast_1d(np.asarray(denominator, dtype=float))
+    if len(denominator) == 0 or denominator[0] == 0:
+        raise ValueError("the first denominator coefficient must not be zero")
+    order = max(len(numerator), len(denominator)) - 1
+    numerator = np.concatenate((numerator, np.zeros(order + 1 - len(numerator))))
+    denominator = np.concatenate((denominator, np.zeros(order + 1 - len(denominator))))
+    numerator = numerator / denominator[0]
+    denominator = denominator / denominator[0]
+
+    a = np.zeros((order, order))
+    if order > 0:
+        a[0] = -denominator[1:]
+        a[1:, :-1] = np.eye(order - 1)
+    b = np.zeros(order)
+    b[:1] = 1.0
+    c = numerator[1:] - denominator[1:] * numerator[0]
+    return a, b, c, numerator[0]
+
+
+def zero_order_hold(a, b, period, theta):
+    """
+    Discretize dx/dt = a x + b u(t - theta) with 0 <= theta < period, return
+    phi and gammas with x(k + 1) = phi x(k) + gamma0 u(k) + gamma1 u(k - 1).
+    """
+    order = len(a)
+
+    def hold(duration):
+        augmented = np.zeros((order + 1, order + 1))
+        augmented[:order, :order] = a * duration
+        augmented[:order, order] = b * duration
+        exponential = matrix_exponential(augmented)
+        return exponential[:order, :order], exponential[:order, order]
+
+    phi, _ = hold(period)
+    late, gamma0 = hold(period - theta)
+    _, early = hold(theta)
+    return phi, gamma0, late @ early
+
+
+class StateSpaceProcess(Plant):
+    """
+    Single input, single output discrete state space model
+
+        c(k) = C x(k) + D m(k - delay)
+        x(k + 1) = A x(k) + B m(k - delay)
+
+    starting from x(0) = 0, with `delay` whole samples of dead time.
+    """
+
+    def __init__(self, a, b, c, d=0.0, period=1.0, delay=0):
+        a = np.atleast_2d(np.asarray(a, dtype=float))
+        order = len(a) if a.size else 0
+        a = a.reshape(order, order)
+        b = np.asarray(b, dtype=float).reshape(order)
+        c = np.asarray(c, dtype=float).reshape(order)
+        if period <= 0 or delay < 0:
+            raise ValueError("period must be positive and delay not negative")
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = float(d)
+        self.period = period
+        self.delay = int(delay)
+        self.reset()
+
+    @property
+    def order(self):
+        return len(self.a)
+
+    def reset(self):
+        self.time = 0
+        self.state = np.zeros(self.order)
+        self.input_data = RingBuffer(self.delay + 1)
+        self.output = 0.0
+
+    def step(self, value):
+        t = self.time
+        self.input_data.append(value)
+        delayed = self.input_data.at(t - self.delay) if t >= self.delay else 0.0
+        self.output = float(self.c @ self.state) + self.d * delayed
+        self.state = self.a @ self.state + self.b * delayed
+        self.time = t + 1
+        return self.output
+
+    def transfer_function(self):
+        """Return the numerator and denominator coefficients of powers of z^-1."""
+        if self.order == 0:
+            return np.array([self.d]), np.array([1.0])
+        denominator = np.poly(self.a)
+        numerator = np.poly(self.a - np.outer(self.b, self.c))
+        return numerator + (self.d - 1) * denominator, denominator
+
+    def simulate(self, inputs):
+        inputs = np.asarray(inputs, dtype=float)
+        delayed = np.zeros(len(inputs))
+        delayed[self.delay :] = inputs[: max(len(inputs) - self.delay, 0)]
+        if lfilter is not None:
+            numerator, denominator = self.transfer_function()
+            return lfilter(numerator, denominator, delayed)
+        return self.simulate_blocks(delayed)
+
+    def simulate_blocks(self, inputs, block_size=BLOCK_SIZE):
+        """
+        Return the response from rest to the already delayed `inputs`.
+
+        Like first_order_filter, every block of samples is solved from rest
+        with the matrix of its impulse response, the state carried between
+        blocks is then stepped once per block with A ** block_size.
+        """
+        size = min(block_size, len(inputs))
+        if size == 0:
+            return np.zeros(0)
+        a, b, c, d = self.a, self.b, self.c, self.d
+        powers = [np.eye(self.order)]
+        for _ in range(size):
+            powers.append(a @ powers[-1])
+        observe = np.array([c @ power for power in powers[:size]]).reshape(size, -1)
+        control = np.array([power @ b for power in powers[size - 1 :: -1]])
+        control = control.reshape(size, -1)
+        impulse = np.concatenate(([d], observe[:-1] @ b))
+        lags = np.subtract.outer(np.arange(size), np.arange(size))
+        transfer = np.where(lags >= 0, impulse[np.maximum(lags, 0)], 0.0)
+
+        blocks = np.zeros((-(-len(inputs) // size), size))
+        blocks.flat[: len(inputs)] = inputs
+        outputs = blocks @ transfer.T
+        driven = blocks @ control
+        states = np.zeros((len(blocks), self.order))
+        for index in range(1, len(blocks)):
+            states[index] = powers[size] @ states[index - 1] + driven[index - 1]
+        outputs += states @ observe.T
+        return outputs.reshape(-1)[: len(inputs)]
+
+
+class TransferFunctionProcess(StateSpaceProcess):
+    """
+    Discrete transfer function with coefficients of ascending powers of z^-1
+    and `delay` whole samples of dead time, that is
+
+        a0 c(k) = b0 m(k - delay) + b1 m(k - delay - 1) + ...
+                  - a1 c(k - 1) - a2 c(k - 2) - ...
+
+    The first order process is numerator [b1, b2], denominator [1, -a1] and
+    a delay of N, except that it ignores the input at sample 0.
+    """
+
+    def __init__(self, numerator, denominator, period=1.0, delay=0):
+        self.numerator = np.asarray(numerator, dtype=float)
+        self.denominator = np.asarray(denominator, dtype=float)
+        a, b, c, d = transfer_function_to_state_space(numerator, denominator)
+        super(TransferFunctionProcess, self).__init__(a, b, c, d, period, delay)
+
+
+class ContinuousProcess(StateSpaceProcess):
+    """
+    Continuous state space model dx/dt = A x + B m(t - theta_prime), c = C x
+    discretized with a zero order hold of `period`.
+
+    The fraction of the dead time shorter than a sample is kept in an extra
+    state holding the previous delayed input, the whole samples N are a delay
+    line. As with the first order process, c(k) is the response at the end of
+    the sample over which m(k) is held.
+    """
+
+    def __init__(self, a, b, c, theta_prime=0.0, period=1.0):
+        a = np.atleast_2d(np.asarray(a, dtype=float))
+        order = len(a)
+        b = np.asarray(b, dtype=float).reshape(order)
+        c = np.asarray(c, dtype=float).reshape(order)
+        if theta_prime < 0 or period <= 0:
+            raise ValueError("theta_prime must not be negative and period positive")
+        n_value = int(theta_prime / period)
+        phi, gamma0, gamma1 = zero_order_hold(
+            a, b, period, theta_prime - n_value * period
+        )
+
+        a = np.zeros((order + 1, order + 1))
+        a[:order, :order] = phi
+        a[:order, order] = gamma1
+        b = np.append(gamma0, 1.0)
+        c = np.append(c, 0.0)
+        super(ContinuousProcess, self).__init__(a, b, c @ a, c @ b, period, n_value)
+        self.theta_prime = theta_prime
+        self.n_value = n_value
+
+
+class SecondOrderProcess(ContinuousProcess):
+    """
+    Second order plus dead time process k e^(-theta' s) / ((tau1 s + 1)(tau2 s + 1)).
+    """
+
+    def __init__(self, gain=1.0, tau1=3.34, tau2=1.0, theta_prime=1.46, period=1.0):
+        if gain <= 0 or tau1 <= 0 or tau2 <= 0:
+            raise ValueError("gain, tau1 and tau2 must be positive")
+        self.gain = gain
+        self.tau1 = tau1
+        self.tau2 = tau2
+        super(SecondOrderProcess, self).__init__(
+            [[-1 / tau1, 0.0], [1 / tau2, -1 / tau2]],
+            [gain / tau1, 0.0],
+            [0.0, 1.0],
+            theta_prime,
+            period,
+        )
+
+
+class IntegratingProcess(ContinuousProcess):
+    """
+    Integrating process k e^(-theta' s) / s, or k e^(-theta' s) / (s (tau s + 1))
+    when a lag `tau` is given.
+    """
+
+    def __init__(self, gain=1.0, tau=None, theta_prime=1.46, period=1.0):
+        if gain <= 0 or (tau is not None and tau <= 0):
+            raise ValueError("gain and tau must be positive")
+        self.gain = gain
+        self.tau = tau
+        if tau is None:
+            a, b, c = [[0.0]], [gain], [1.0]
+        else:
+            a, b, c = [[-1 / tau, 0.0], [1.0, 0.0]], [gain / tau, 0.0], [0.0, 1.0]
+        super(IntegratingProcess, self).__init__(a, b, c, theta_prime, period)
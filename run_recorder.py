@@ -0,0 +1,225 @@
+"""
+run_recorder.py
+Chunked recording of simulation runs to disk and loading them back.
+Version: 1.0.2
+"""
+import os
+import csv
+import json
+import time
+import itertools
+import queue
+import struct
+import threading
+import numpy as np
+
+HEADER_SIZE = 128
+
+
+def npy_header(rows, columns):
+    """Header of a float64 .npy file, padded to a fixed size to patch in place."""
+    header = (
+        f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({rows}, {columns}), }}"
+    )
+    header = header.ljust(HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode()
+
+
+def new_run_directory(base):
+    """Return a directory name under `base` for a run started now."""
+    name = os.path.join(base, time.strftime("run_%Y%m%d_%H%M%S"))
+    candidate = name
+    count = 1
+    while os.path.exists(candidate):
+        candidate = f"{name}_{count}"
+        count += 1
+    return candidate
+
+
+class RunRecorder:
+    """
+    Sink writing every recorded sample to numbered segment files in `directory`.
+
+    Samples are stored in a preallocated chunk of `chunk_size` rows, full
+    chunks are handed to a writer thread so recording never waits on the disk.
+    A new segment is started every `segment_size` samples. Segments are .npy
+    files of shape (samples, columns) or, with fmt="csv", text files with a
+    header row. run.json lists the columns, format and segments.
+
+    The .npy header and run.json are updated after every chunk written, so a
+    run interrupted by a crash loads up to its last complete chunk. An error
+    of the writer thread is kept in `error` and raised again by `record` and
+    `close`.
+    """
+
+    def __init__(
+        self, directory, columns, fmt="npy", chunk_size=65536, segment_size=1048576
+    ):
+        if fmt not in ("npy", "csv"):
+            raise ValueError("fmt must be npy or csv")
+        os.makedirs(directory)
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.segment_size = segment_size
+        self.segments = list()
+        self.chunk = np.empty((chunk_size, len(self.columns)))
+        self.rows = 0
+        self.error = None
+
+        self.chunks = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self.write_chunks, daemon=True)
+        self.writer.start()
+        self.write_metadata()
+
+    def record(self, sample):
+        self.chunk[self.rows] = sample
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the samples recorded so far to the writer thread."""
+        if self.error is not None:
+            raise self.error
+        if self.rows > 0:
+            self.chunks.put(self.chunk[: self.rows])
+            self.chunk = np.empty((self.chunk_size, len(self.columns)))
+            self.rows = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.chunks.put(None)
+            self.writer.join()
+        if self.error is not None:
+            raise self.error
+        self.write_metadata()
+
+    def write_metadata(self):
+        metadata = {
+            "columns": self.columns,
+            "format": self.fmt,
+            "segments": self.segments,
+        }
+        path = os.path.join(self.directory, "run.json")
+        with open(path + ".tmp", "w") as output:
+            json.dump(metadata, output, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def write_chunks(self):
+        try:
+            self.write_segments()
+        except Exception as error:
+            self.error = error
+
+    def write_segments(self):
+        segment = None
+        rows = 0
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                break
+            while len(chunk) > 0:
+                if segment is None:
+                    segment = self.open_segment()
+                    rows = 0
+                part = chunk[: self.segment_size - rows]
+                chunk = chunk[len(part) :]
+                if self.fmt == "npy":
+                    segment.write(part.tobytes())
+                else:
+                    csv.writer(segment).writerows(part.tolist())
+                rows += len(part)
+                if self.fmt == "npy":
+                    segment.seek(0)
+                    segment.write(npy_header(rows, len(self.columns)))
+                    segment.seek(0, os.SEEK_END)
+                segment.flush()
+                self.segments[-1]["samples"] = rows
+                if rows == self.segment_size:
+                    segment.close()
+                    segment = None
+            self.write_metadata()
+        if segment is not None:
+            segment.close()
+
+    def open_segment(self):
+        name = f"segment_{len(self.segments):05d}.{self.fmt}"
+        self.segments.append({"file": name, "samples": 0})
+        if self.fmt == "npy":
+            segment = open(os.path.join(self.directory, name), "wb")
+            segment.write(npy_header(0, len(self.columns)))
+        else:
+            segment = open(os.path.join(self.directory, name), "w", newline="")
+            csv.writer(segment).writerow(self.columns)
+        return segment
+
+
+def read_metadata(directory):
+    with open(os.path.join(directory, "run.json"), "r") as metadata:
+        return json.load(metadata)
+
+
+def load_segment(directory, metadata, segment):
+    """
+    Return the samples of `segment` listed in run.json, ignoring any written
+    after it was last updated, such as a chunk cut short by a crash.
+    """
+    path = os.path.join(directory, segment["file"])
+    columns = len(metadata["columns"])
+    rows = segment["samples"]
+    if metadata["format"] == "npy":
+        rows = min(rows, (os.path.getsize(path) - HEADER_SIZE) // (8 * columns))
+        if rows <= 0:
+            return np.empty((0, columns))
+        return np.memmap(
+            path, dtype="<f8", mode="r", offset=HEADER_SIZE, shape=(rows, columns)
+        )
+    with open(path, "r") as source:
+        next(source, None)
+        lines = [line for line in itertools.islice(source, rows) if line.endswith("\n")]
+    if not lines:
+        return np.empty((0, columns))
+    return np.loadtxt(lines, delimiter=",", ndmin=2)
+
+
+def load_run(directory):
+    """Return the columns of a recorded run as a dictionary of arrays."""
+    metadata = read_metadata(directory)
+    columns = metadata["columns"]
+    segments = [
+        load_segment(directory, metadata, segment) for segment in metadata["segments"]
+    ]
+    data = np.concatenate(segments) if segments else np.empty((0, len(columns)))
+    return {name: np.array(data[:, index]) for index, name in enumerate(columns)}
+
+
+class RunInputSource:
+    """Input source replaying one column of a recorded run, segment by segment."""
+
+    def __init__(self, directory, column="input", chunk_size=65536):
+        self.directory = directory
+        self.metadata = read_metadata(directory)
+        self.index = self.metadata["columns"].index(column)
+        self.segments = list(self.metadata["segments"])
+        self.chunk_size = chunk_size
+        self.data = None
+        self.position = 0
+
+    def read(self):
+        while self.data is None or self.position >= len(self.data):
+            if not self.segments:
+                return list()
+            segment = self.segments.pop(0)
+            self.data = load_segment(self.directory, self.metadata, segment)
+            self.position = 0
+        chunk = self.data[self.position : self.position + self.chunk_size, self.index]
+        self.position += len(chunk)
+        return chunk.tolist()
+
+    def close(self):
+        self.segments = list()
+        self.data = None
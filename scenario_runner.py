@@ -0,0 +1,351 @@
+"""
+scenario_runner.py
+Headless runs of scripted scenarios of parameter changes, set points and disturbances.
+Version: 1.0.2
+"""
+import os
+import json
+import math
+import time
+import argparse
+from input_sources import open_input_source
+from parameter_model import ParameterModel
+from performance_metrics import StreamingMetrics
+from process_engine import FirstOrderProcess, PIDController, ProcessSimulation
+
+SCENARIO_KEYS = ("name", "samples", "model", "process", "controller", "seed", "events")
+EVENT_KEYS = (
+    "sample",
+    "auto_mode",
+    "magnitude",
+    "set_point",
+    "noise",
+    "process",
+    "controller",
+    "disturbance",
+    "input",
+)
+
+
+def load_scenario(path):
+    """
+    Return the scenario of the JSON file `path`, named after the file unless
+    it gives a name, with input files relative to its directory.
+    """
+    with open(path) as source:
+        scenario = json.load(source)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    scenario["directory"] = os.path.dirname(os.path.abspath(path))
+    return scenario
+
+
+def find_scenarios(paths):
+    """Return the scenario files in `paths`, every .json file of a directory."""
+    files = list()
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".json")
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def check_scenario(scenario):
+    """Raise ValueError if `scenario` has unknown keys or misplaced events."""
+    name = scenario.get("name", "scenario")
+    unknown = set(scenario) - set(SCENARIO_KEYS) - {"directory"}
+    if unknown:
+        raise ValueError(f"{name}: unknown keys {', '.join(sorted(unknown))}")
+    samples = scenario.get("samples")
+    if not isinstance(samples, int) or samples < 0:
+        raise ValueError(f"{name}: samples must be a non negative integer")
+    for index, event in enumerate(scenario.get("events", list())):
+        unknown = set(event) - set(EVENT_KEYS)
+        if unknown:
+            raise ValueError(
+                f"{name}: event {index} has unknown keys {', '.join(sorted(unknown))}"
+            )
+        sample = event.get("sample")
+        if not isinstance(sample, int) or not 0 <= sample <= samples:
+            raise ValueError(
+                f"{name}: event {index} must have a sample between 0 and {samples}"
+            )
+
+
+def create_scenario_disturbance(spec, seed):
+    """
+    Return the disturbance of `spec`, a dictionary with the kind and its
+    parameters or a list of them to add together, None for no disturbance.
+    """
+    if spec is None:
+        return None
+    from disturbances import CombinedDisturbance, LoadProfile, create_disturbance
+
+    if isinstance(spec, list):
+        return CombinedDisturbance(
+            create_scenario_disturbance(
+                component, None if seed is None else seed + [index]
+            )
+            for index, component in enumerate(spec)
+        )
+    spec = dict(spec)
+    kind = spec.pop("kind", None)
+    if kind == "load":
+        return LoadProfile(spec["schedule"])
+    return create_disturbance(
+        kind,
+        spec.get("magnitude", 0.1),
+        spec.get("seed", seed),
+        spec.get("correlation", 0.9),
+    )
+
+
+class ScenarioRun:
+    """
+    ProcessSimulation driven by the events of a scenario.
+
+    The events of a sample are applied, in the order listed, before that
+    sample is simulated. In auto mode every set point change or mode switch
+    closes a segment with the performance metrics of the response since the
+    previous one.
+    """
+
+    def __init__(self, scenario, sink=None):
+        check_scenario(scenario)
+        self.scenario = scenario
+        self.name = scenario.get("name", "scenario")
+        self.model = scenario.get("model", "first_order")
+        self.seed = scenario.get("seed")
+        if self.model == "first_order":
+            process = FirstOrderProcess()
+        else:
+            from plant_server import create_plant
+
+            process = create_plant(self.model, scenario.get("process", dict()))
+        self.parameters = ParameterModel(period=process.period)
+        self.simulation = ProcessSimulation(
+            process,
+            PIDController(period=process.period),
+            history_size=1,
+            sink=sink,
+            metrics=StreamingMetrics(),
+        )
+        if self.model == "first_order":
+            self.set_parameters(ParameterModel.PROCESS, scenario.get("process", dict()))
+        self.set_parameters(
+            ParameterModel.CONTROLLER, scenario.get("controller", dict())
+        )
+        self.segments = list()
+        self.segment_start = 0
+
+    def set_parameters(self, names, values):
+        if self.model != "first_order" and names == ParameterModel.PROCESS:
+            raise ValueError(f"{self.name}: only first order parameters can change")
+        unknown = set(values) - set(names)
+        if unknown:
+            raise ValueError(
+                f"{self.name}: unknown parameters {', '.join(sorted(unknown))}"
+            )
+        for name, value in values.items():
+            self.parameters.set(name, value)
+        if not self.parameters.valid(*values):
+            raise ValueError(f"{self.name}: invalid parameters {values}")
+        if names == ParameterModel.PROCESS:
+            self.parameters.apply_process(self.simulation.process)
+        self.parameters.apply_controller(self.simulation.controller)
+
+    def close_segment(self):
+        simulation = self.simulation
+        if simulation.auto_mode and simulation.time > self.segment_start:
+            segment = {
+                "start": self.segment_start,
+                "end": simulation.time,
+                "set_point": simulation.set_point,
+            }
+            segment.update(simulation.performance())
+            self.segments.append(segment)
+        self.segment_start = simulation.time
+
+    def apply(self, event, index):
+        simulation = self.simulation
+        if "set_point" in event or "auto_mode" in event:
+            self.close_segment()
+        if "process" in event:
+            self.set_parameters(ParameterModel.PROCESS, event["process"])
+        if "controller" in event:
+            self.set_parameters(ParameterModel.CONTROLLER, event["controller"])
+        if "auto_mode" in event:
+            simulation.auto_mode = bool(event["auto_mode"])
+        if "set_point" in event:
+            simulation.set_point = float(event["set_point"])
+        if "magnitude" in event:
+            simulation.magnitude = float(event["magnitude"])
+        if "noise" in event:
+            simulation.noise = float(event["noise"])
+        if "disturbance" in event:
+            seed = None if self.seed is None else [self.seed, index]
+            simulation.set_disturbance(
+                create_scenario_disturbance(event["disturbance"], seed)
+            )
+        if "input" in event:
+            source = event["input"]
+            if source is not None and source != "-":
+                source = os.path.join(self.scenario.get("directory", ""), source)
+            simulation.set_input_profile(
+                None if source is None else open_input_source(source)
+            )
+
+    def advance(self, until):
+        step = self.simulation.step
+        for _ in range(until - self.simulation.time):
+            step()
+
+    def run(self):
+        """Simulate the scenario and return its results."""
+        simulation = self.simulation
+        start = time.perf_counter()
+        events = enumerate(self.scenario.get("events", list()))
+        for index, event in sorted(events, key=lambda item: item[1]["sample"]):
+            self.advance(event["sample"])
+            self.apply(event, index)
+        self.advance(self.scenario["samples"])
+        self.close_segment()
+        simulation.set_input_profile(None)
+        return {
+            "name": self.name,
+            "samples": simulation.time,
+            "elapsed": time.perf_counter() - start,
+            "final": dict(zip(simulation.COLUMNS, simulation.sample or ())),
+            "segments": self.segments,
+        }
+
+
+def run_scenario(scenario, directory=None, fmt="npy"):
+    """
+    Run `scenario`, a dictionary or the path of a JSON file, and return its
+    results. With a `directory` the samples are recorded to a subdirectory
+    named after the scenario, in the format `fmt` of RunRecorder.
+    """
+    if isinstance(scenario, str):
+        scenario = load_scenario(scenario)
+    recorder = None
+    if directory is not None:
+        from run_recorder import RunRecorder
+
+        recorder = RunRecorder(
+            os.path.join(directory, scenario.get("name", "scenario")),
+            ProcessSimulation.COLUMNS,
+            fmt,
+        )
+    try:
+        return ScenarioRun(scenario, recorder).run()
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+def run_file(path, directory=None, fmt="npy"):
+    """Run the scenario file `path`, returning its error instead of raising it."""
+    try:
+        return run_scenario(path, directory, fmt)
+    except (OSError, ValueError, TypeError, KeyError) as error:
+        return {"name": path, "error": str(error)}
+
+
+def run_scenarios(paths, directory=None, fmt="npy", workers=None):
+    """
+    Run every scenario file in `paths`, directories included, on a pool of
+    `workers` processes and return their results in the same order.
+    """
+    files = find_scenarios(paths)
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    arguments = ([directory] * len(files), [fmt] * len(files))
+    if workers == 1:
+        return list(map(run_file, files, *arguments))
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(run_file, files, *arguments))
+
+
+def finite(value):
+    """Return `value` with infinite or NaN numbers replaced by None."""
+    if isinstance(value, dict):
+        return {key: finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [finite(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def write_results(results, path):
+    """
+    Write `results` as JSON, with null for metrics that are not finite, such
+    as the settling time of a response that never settles.
+    """
+    with open(path, "w") as output:
+        json.dump(finite(results), output, indent=1, allow_nan=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run scenario files headless and write their results."
+    )
+    parser.add_argument(
+        "scenarios", nargs="+", help="scenario files or directories of them"
+    )
+    parser.add_argument(
+        "--output",
+        default="results",
+        help="write the results and samples to a new directory in OUTPUT",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("npy", "csv"),
+        default="npy",
+        help="format of the recorded samples",
+    )
+    parser.add_argument(
+        "--no-samples",
+        action="store_true",
+        help="only write the results, without recording the samples",
+    )
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+    from run_recorder import new_run_directory
+
+    directory = new_run_directory(args.output)
+    os.makedirs(directory)
+    start = time.perf_counter()
+    results = run_scenarios(
+        args.scenarios,
+        None if args.no_samples else directory,
+        args.format,
+        args.workers,
+    )
+    elapsed = time.perf_counter() - start
+    write_results(results, os.path.join(directory, "results.json"))
+
+    failed = 0
+    for result in results:
+        if "error" in result:
+            failed += 1
+            print(f"{result['name']}: {result['error']}")
+            continue
+        iae = sum(segment["iae"] for segment in result["segments"])
+        print(
+            f"{result['name']}: {result['samples']} samples in"
+            f" {result['elapsed']:.2f} s, {len(result['segments'])} segments,"
+            f" IAE {iae:.3f}"
+        )
+    print(f"{len(results)} scenarios in {elapsed:.2f} s, results in {directory}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
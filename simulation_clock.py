@@ -0,0 +1,86 @@
+"""
+simulation_clock.py
+Simulated time decoupled from wall time and from the rendering rate.
+Version: 1.0.2
+"""
+import math
+import time
+
+
+class SimulationClock:
+    """
+    Number of samples due at each frame for a simulation running `speed` times
+    faster than real time.
+
+    With a speed of None the simulation runs as fast as possible, advancing
+    `max_steps` samples every frame. A frame never advances more than
+    `max_steps` samples, samples that could not be kept up with are dropped
+    instead of accumulating and counted in `dropped`.
+    """
+
+    def __init__(self, period=1.0, speed=1.0, frame_rate=30, max_steps=5000):
+        self.period = period
+        self.speed = speed
+        self.frame_rate = frame_rate
+        self.max_steps = max_steps
+        self.steps = 0
+        self.dropped = 0
+        self.rebase()
+
+    @property
+    def frame_interval(self):
+        """Milliseconds between rendered frames."""
+        return int(1000 / self.frame_rate)
+
+    def rebase(self):
+        """Continue counting as if the last sample had been taken now."""
+        self.origin = time.monotonic()
+        if self.speed is not None:
+            self.origin -= (self.steps - 1) * self.period / self.speed
+
+    def set_period(self, period):
+        if period != self.period:
+            self.period = period
+            self.rebase()
+
+    def set_speed(self, speed):
+        if speed != self.speed:
+            self.speed = speed
+            self.rebase()
+
+    def reset(self):
+        self.steps = 0
+        self.rebase()
+
+    def time_to_next(self):
+        """Seconds until the next sample is due."""
+        if self.speed is None:
+            return 0.0
+        return self.origin + self.steps * self.period / self.speed - time.monotonic()
+
+    def advance(self, count):
+        """Count `count` samples as taken, return the seconds until the last is due."""
+        self.steps += count
+        if self.speed is None:
+            return 0.0
+        return (
+            self.origin + (self.steps - 1) * self.period / self.speed - time.monotonic()
+        )
+
+    def steps_due(self):
+        """Return the samples to simulate now and count them as taken."""
+        if self.speed is None:
+            self.steps += self.max_steps
+            return self.max_steps
+        elapsed = time.monotonic() - self.origin
+        due = math.floor(elapsed * self.speed / self.period) + 1 - self.steps
+        if due <= 0:
+            return 0
+        if due > self.max_steps:
+            self.dropped += due - self.max_steps
+            due = self.max_steps
+            self.steps += due
+            self.rebase()
+            return due
+        self.steps += due
+        return due
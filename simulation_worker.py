@@ -0,0 +1,123 @@
+"""
+simulation_worker.py
+Background thread stepping a simulation on its own clock.
+Version: 1.0.2
+"""
+import queue
+import threading
+from tick_profiler import NullProfiler
+
+
+class SimulationWorker(threading.Thread):
+    """
+    Advance `simulation` in a background thread at the times given by `clock`.
+
+    Samples are handed over in batches through the `samples` queue and can be
+    taken with `take_samples` at whatever pace the consumer runs. While more
+    than `max_pending` samples (one frame of the clock by default) wait to be
+    taken, the worker pauses, so a slow consumer slows the simulation down
+    instead of letting the queue grow. Any change to
+    the simulation or the clock from another thread must hold `lock`, which
+    the worker only holds while stepping a batch of at most `max_batch`
+    samples. An exception raised by the simulation pauses the worker and is
+    kept in `error`. While `simulation.input_ready()` is False the worker
+    waits without holding the lock and without counting samples as due. The
+    time spent stepping every batch is recorded in the "simulate" stage of
+    `profiler`.
+    """
+
+    def __init__(
+        self, simulation, clock, max_batch=1000, idle_wait=0.05, max_pending=None
+    ):
+        super(SimulationWorker, self).__init__(daemon=True)
+        self.simulation = simulation
+        self.clock = clock
+        self.max_batch = max_batch
+        self.idle_wait = idle_wait
+        self.max_pending = max_pending if max_pending is not None else clock.max_steps
+        self.lock = threading.RLock()
+        self.samples = queue.SimpleQueue()
+        # Written by the worker and by the consumer only, respectively.
+        self.produced = 0
+        self.consumed = 0
+        self.taken = threading.Event()
+        self.running = False
+        self.stopped = threading.Event()
+        self.due = 0
+        self.error = None
+        self.profiler = NullProfiler()
+
+    def run(self):
+        simulation = self.simulation
+        clock = self.clock
+        while not self.stopped.is_set():
+            self.taken.clear()
+            with self.lock:
+                ready = simulation.input_ready()
+                backlog = self.produced - self.consumed >= self.max_pending
+                if not self.running or not ready or backlog:
+                    clock.rebase()
+                    self.due = 0
+                elif self.due == 0:
+                    self.due = clock.steps_due()
+                if self.due > 0:
+                    steps = min(self.due, self.max_batch)
+                    batch = list()
+                    try:
+                        with self.profiler.stage("simulate"):
+                            for _ in range(steps):
+                                if not simulation.input_ready():
+                                    break
+                                simulation.step()
+                                batch.append(simulation.sample)
+                    except Exception as error:
+                        self.error = error
+                        self.running = False
+                    self.due = self.due - steps if len(batch) == steps else 0
+                    self.produced += len(batch)
+                    self.samples.put(batch)
+                    continue
+                wait = (
+                    self.clock.time_to_next()
+                    if self.running and ready
+                    else self.idle_wait
+                )
+            if backlog and self.running:
+                self.taken.wait(self.idle_wait)
+            elif wait > 0:
+                self.stopped.wait(min(wait, self.idle_wait))
+
+    def take_samples(self):
+        """Return every sample produced since the last call, oldest first."""
+        samples = list()
+        while True:
+            try:
+                samples.extend(self.samples.get_nowait())
+            except queue.Empty:
+                self.consumed += len(samples)
+                self.taken.set()
+                return samples
+
+    def reset(self):
+        """Pause and reset the simulation and the clock, dropping samples not taken."""
+        with self.lock:
+            self.running = False
+            self.simulation.reset()
+            self.clock.reset()
+            self.due = 0
+            self.take_samples()
+
+    def restore(self, snapshot):
+        """Pause and continue the simulation from `snapshot`, dropping samples not taken."""
+        with self.lock:
+            self.running = False
+            self.simulation.restore(snapshot)
+            self.clock.reset()
+            self.due = 0
+            self.take_samples()
+
+    def stop(self):
+        self.stopped.set()
+        self.taken.set()
+        if self.is_alive():
+            self.join()
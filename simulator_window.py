@@ -0,0 +1,797 @@
+"""
+simulator_window.py
+Main window of the simulator, the parameter fields, controls and live plots.
+Version: 1.0.2
+"""
+import os
+import pickle
+import threading
+from PyQt5 import QtWidgets, QtCore
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+from disturbances import create_disturbance
+from history_buffer import SampleHistory
+from history_index import HistoryIndex
+from input_sources import open_input_source
+from live_plot import ProcessPlot
+from parameter_model import ParameterModel
+from performance_metrics import StreamingMetrics
+from pid_tuner import tune_pid
+from process_engine import ProcessSimulation
+from run_recorder import RunRecorder, new_run_directory
+from simulation_clock import SimulationClock
+from simulation_worker import SimulationWorker
+from tick_profiler import NullProfiler, TickProfiler
+
+
+class Canvas(FigureCanvas):
+    """Figure canvas timing its full redraws in the "draw" stage of `profiler`."""
+
+    def __init__(self, figure, profiler):
+        super(Canvas, self).__init__(figure)
+        self.profiler = profiler
+
+    def draw(self):
+        with self.profiler.stage("draw"):
+            super(Canvas, self).draw()
+
+
+class Window(QtWidgets.QDialog):
+    tuned = QtCore.pyqtSignal(object)
+
+    def __init__(
+        self,
+        parent=None,
+        plot_window=50,
+        record_dir=None,
+        record_format="npy",
+        speed=1.0,
+        frame_rate=30,
+        input_path=None,
+        profile=False,
+        profile_output=None,
+        seed=None,
+        history_limit=2000000,
+    ):
+        super(Window, self).__init__(parent)
+        self.seed = seed
+        self.time_on = False
+        self.file_to_input = False
+        self.clock = SimulationClock(speed=speed, frame_rate=frame_rate)
+        self.profile_output = profile_output
+        self.profiler = NullProfiler()
+        if profile or profile_output is not None:
+            self.profiler = TickProfiler(self.clock.frame_interval / 1000)
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update_figure)
+        self.timer.start(self.clock.frame_interval)
+
+        self.record_dir = record_dir if record_dir is not None else "runs"
+        self.record_format = record_format
+        self.recorder = None
+        self.parameters = ParameterModel()
+        self.simulation = ProcessSimulation(
+            history_size=plot_window, metrics=StreamingMetrics()
+        )
+        self.history = SampleHistory(plot_window, ProcessSimulation.COLUMNS)
+        self.history_index = HistoryIndex(ProcessSimulation.COLUMNS, history_limit)
+        self.worker = SimulationWorker(self.simulation, self.clock)
+        self.worker.profiler = self.profiler
+        self.worker.start()
+
+        self.setWindowTitle("Dynamic Process Simulator")
+
+        # Figure instance to plot on
+        self.figure = Figure()
+        self.figure.set_facecolor("none")
+        self.setStyleSheet("background-color:#252526;")
+
+        # Canvas Widget that displays the `figure`
+        self.canvas = Canvas(self.figure, self.profiler)
+        self.canvas.setMinimumSize(1200, 600)
+        self.plot = ProcessPlot(self.figure, plot_window)
+
+        # Navigation widget
+        self.toolbar = NavigationToolbar(self.canvas, self)
+        self.toolbar.setStyleSheet("background-color : white;")
+
+        # First line Widgets
+        self.gain_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.gain_line_edit.setText("1")
+        self.gain_line_edit.returnPressed.connect(self.edit_return)
+        self.gain_line_edit.textChanged.connect(self.set_time_off)
+        self.tau_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.tau_line_edit.setText("3.34")
+        self.tau_line_edit.returnPressed.connect(self.edit_return)
+        self.tau_line_edit.textChanged.connect(self.set_time_off)
+        self.theta_prime_line_edit = QtWidgets.QLineEdit(
+            self, styleSheet="color : white"
+        )
+        self.theta_prime_line_edit.setText("1.46")
+        self.theta_prime_line_edit.returnPressed.connect(self.edit_return)
+        self.theta_prime_line_edit.textChanged.connect(self.set_time_off)
+        self.period_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.period_line_edit.setText("1")
+        self.period_line_edit.returnPressed.connect(self.edit_return)
+        self.period_line_edit.textChanged.connect(self.set_time_off)
+        self.speed_box = QtWidgets.QComboBox(self, styleSheet="color : white")
+        self.speed_box.addItems(["1x", "10x", "100x", "Max"])
+        if speed is None:
+            self.speed_box.setCurrentText("Max")
+        else:
+            if self.speed_box.findText(f"{speed:g}x") < 0:
+                self.speed_box.addItem(f"{speed:g}x")
+            self.speed_box.setCurrentText(f"{speed:g}x")
+        self.speed_box.currentTextChanged.connect(self.set_speed)
+
+        # First line elements.
+        hbox1 = QtWidgets.QHBoxLayout()
+        hbox1.addWidget(QtWidgets.QLabel(text="Gain (k):", styleSheet="color : white"))
+        hbox1.addWidget(self.gain_line_edit)
+        hbox1.addWidget(
+            QtWidgets.QLabel(text="Time Constant (𝜏):", styleSheet="color : white")
+        )
+        hbox1.addWidget(self.tau_line_edit)
+        hbox1.addWidget(
+            QtWidgets.QLabel(text="Dead Time (θ'):", styleSheet="color : white")
+        )
+        hbox1.addWidget(self.theta_prime_line_edit)
+        hbox1.addWidget(QtWidgets.QLabel(text="Period (T)", styleSheet="color : white"))
+        hbox1.addWidget(self.period_line_edit)
+        hbox1.addWidget(QtWidgets.QLabel(text="Speed:", styleSheet="color : white"))
+        hbox1.addWidget(self.speed_box)
+
+        # Second line Widgets
+        self.a1_label = QtWidgets.QLabel(
+            self, text="a1 = ?", styleSheet="color : white"
+        )
+        self.b1_label = QtWidgets.QLabel(
+            self, text="b1 = ?", styleSheet="color : white"
+        )
+        self.b2_label = QtWidgets.QLabel(
+            self, text="b2 = ?", styleSheet="color : white"
+        )
+        self.n_value_label = QtWidgets.QLabel(
+            self, text="N = ?", styleSheet="color : white"
+        )
+
+        self.q0_label = QtWidgets.QLabel(
+            self, text="q0 = ?", styleSheet="color : white"
+        )
+
+        self.q1_label = QtWidgets.QLabel(
+            self, text="q1 = ?", styleSheet="color : white"
+        )
+
+        self.q2_label = QtWidgets.QLabel(
+            self, text="q2 = ?", styleSheet="color : white"
+        )
+
+        self.error_label = QtWidgets.QLabel(
+            self, text="error = ?", styleSheet="color : white"
+        )
+
+        self.mk_label = QtWidgets.QLabel(
+            self, text="m(k) = ?", styleSheet="color : white"
+        )
+
+        self.ck_label = QtWidgets.QLabel(
+            self, text="c(k) = ?", styleSheet="color : white"
+        )
+
+        self.step_box = QtWidgets.QCheckBox(
+            "Step Function", self, checked=True, styleSheet="color : white"
+        )
+        self.noise_box = QtWidgets.QCheckBox(
+            "Add Noise", self, checked=False, styleSheet="color : white"
+        )
+        self.record_box = QtWidgets.QCheckBox(
+            "Record Run", self, checked=False, styleSheet="color : white"
+        )
+        self.full_history_box = QtWidgets.QCheckBox(
+            "Full History", self, checked=False, styleSheet="color : white"
+        )
+
+        self.manual_mode = QtWidgets.QRadioButton(
+            self, text="Manual Mode", checked=True, styleSheet="color : white"
+        )
+        self.manual_mode.toggled.connect(self.set_step_magnitude)
+        self.auto_mode = QtWidgets.QRadioButton(
+            self, text="Auto Mode", styleSheet="color : white"
+        )
+        self.auto_mode.toggled.connect(self.set_auto_mode)
+
+        self.kc_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.set_point_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.integral_line_edit = QtWidgets.QLineEdit(self, styleSheet="color : white")
+        self.derivative_line_edit = QtWidgets.QLineEdit(
+            self, styleSheet="color : white"
+        )
+        self.kc_line_edit.returnPressed.connect(self.set_auto_time_on)
+        self.kc_line_edit.setText("1.957983")
+        self.kc_line_edit.textChanged.connect(self.set_auto_time_off)
+        self.set_point_line_edit.returnPressed.connect(self.set_auto_time_on)
+        self.set_point_line_edit.textChanged.connect(self.set_auto_time_off)
+        self.integral_line_edit.returnPressed.connect(self.set_auto_time_on)
+        self.integral_line_edit.setText("4.564447")
+        self.integral_line_edit.textChanged.connect(self.set_auto_time_off)
+        self.derivative_line_edit.returnPressed.connect(self.set_auto_time_on)
+        self.derivative_line_edit.setText("0.476814")
+        self.derivative_line_edit.textChanged.connect(self.set_auto_time_off)
+
+        self.step_magnitude_line_edit = QtWidgets.QLineEdit(
+            self, styleSheet="color : white"
+        )
+        self.step_magnitude_line_edit.returnPressed.connect(self.set_time_on)
+        self.step_magnitude_line_edit.textChanged.connect(self.set_time_off)
+
+        self.step_noise_line_edit = QtWidgets.QLineEdit(
+            self, styleSheet="color : black"
+        )
+        self.step_noise_line_edit.setDisabled(True)
+        self.noise_type_box = QtWidgets.QComboBox(self, styleSheet="color : black")
+        self.noise_type_box.addItems(["Step", "White", "Colored", "Random Walk"])
+        self.noise_type_box.setDisabled(True)
+        self.noise_type_box.currentTextChanged.connect(
+            lambda: self.parameter_changed("noise", self.step_noise_line_edit.text())
+        )
+        self.step_noise_line_edit.returnPressed.connect(self.set_time_on)
+        self.step_noise_line_edit.textChanged.connect(self.set_time_off)
+
+        self.step_box.stateChanged.connect(
+            lambda: self.input_button_state(self.step_box)
+        )
+        self.noise_box.stateChanged.connect(
+            lambda: self.noise_button_state(self.noise_box)
+        )
+        self.record_box.stateChanged.connect(
+            lambda: self.record_button_state(self.record_box)
+        )
+        self.full_history_box.stateChanged.connect(self.full_history_state)
+
+        self.file_button = QtWidgets.QPushButton(
+            "Browse File", styleSheet="color : black;"
+        )
+        self.file_button.setDisabled(True)
+        self.file_button.setAutoDefault(False)
+        self.file_button.clicked.connect(self.getfile)
+
+        self.tune_button = QtWidgets.QPushButton(
+            "Tune PID", styleSheet="color : white;"
+        )
+        self.tune_button.setAutoDefault(False)
+        self.tune_button.clicked.connect(self.tune_controller)
+        self.tuned.connect(self.apply_tuning)
+
+        self.save_state_button = QtWidgets.QPushButton(
+            "Save State", styleSheet="color : white;"
+        )
+        self.save_state_button.setAutoDefault(False)
+        self.save_state_button.clicked.connect(self.save_state)
+
+        self.load_state_button = QtWidgets.QPushButton(
+            "Load State", styleSheet="color : white;"
+        )
+        self.load_state_button.setAutoDefault(False)
+        self.load_state_button.clicked.connect(self.load_state)
+
+        self.reset_button = QtWidgets.QPushButton("Reset", styleSheet="color : white;")
+        self.reset_button.setAutoDefault(False)
+        self.reset_button.clicked.connect(self.reset)
+
+        self.parameter_edits = {
+            "gain": self.gain_line_edit,
+            "tau": self.tau_line_edit,
+            "theta_prime": self.theta_prime_line_edit,
+            "period": self.period_line_edit,
+            "kc": self.kc_line_edit,
+            "integral_constant": self.integral_line_edit,
+            "derivative_constant": self.derivative_line_edit,
+            "set_point": self.set_point_line_edit,
+            "magnitude": self.step_magnitude_line_edit,
+            "noise": self.step_noise_line_edit,
+        }
+        for name, edit in self.parameter_edits.items():
+            edit.textChanged.connect(
+                lambda text, name=name: self.parameter_changed(name, text)
+            )
+
+        # Second line column of labels.
+        vbox1 = QtWidgets.QVBoxLayout()
+        vbox1.addWidget(self.a1_label)
+        vbox1.addWidget(self.b1_label)
+        vbox1.addWidget(self.b2_label)
+        vbox1.addWidget(self.n_value_label)
+        vbox1.addWidget(self.mk_label)
+
+        vbox8 = QtWidgets.QVBoxLayout()
+        vbox8.addWidget(self.q0_label)
+        vbox8.addWidget(self.q1_label)
+        vbox8.addWidget(self.q2_label)
+        vbox8.addWidget(self.error_label)
+        vbox8.addWidget(self.ck_label)
+
+        # Second line column of buttons.
+        vbox2 = QtWidgets.QVBoxLayout()
+        vbox2.addWidget(QtWidgets.QLabel(text="Input: ", styleSheet="color : white"))
+        vbox2.addWidget(self.step_box)
+        vbox2.addWidget(self.noise_box)
+        vbox2.addWidget(self.noise_type_box)
+        vbox2.addWidget(self.record_box)
+        vbox2.addWidget(self.full_history_box)
+        vbox2.addStretch()
+
+        # Third line column of additional information.
+        vbox3 = QtWidgets.QVBoxLayout()
+        vbox3.addWidget(
+            QtWidgets.QLabel(
+                text="Magnitude of step (Mo): ", styleSheet="color : white"
+            )
+        )
+        vbox3.addWidget(self.step_magnitude_line_edit)
+        vbox3.addWidget(
+            QtWidgets.QLabel(
+                text="Magnitude of noise step (Po): ", styleSheet="color : white"
+            )
+        )
+        vbox3.addWidget(self.step_noise_line_edit)
+
+        vbox4 = QtWidgets.QVBoxLayout()
+        vbox4.addWidget(self.file_button)
+        vbox4.addWidget(self.tune_button)
+        vbox4.addWidget(self.reset_button)
+
+        vbox9 = QtWidgets.QVBoxLayout()
+        vbox9.addWidget(self.save_state_button)
+        vbox9.addWidget(self.load_state_button)
+        vbox9.addStretch()
+
+        # Automatic line column.
+        vbox5 = QtWidgets.QVBoxLayout()
+        vbox5.addWidget(
+            QtWidgets.QLabel(text="Mode selection:", styleSheet="color : white")
+        )
+        vbox5.addWidget(self.manual_mode)
+        vbox5.addWidget(self.auto_mode)
+        vbox5.addStretch()
+
+        # Auto input column.
+        vbox6 = QtWidgets.QVBoxLayout()
+        vbox6.addWidget(
+            QtWidgets.QLabel(text="Controller Gain (Kc):", styleSheet="color : white")
+        )
+        vbox6.addWidget(self.kc_line_edit)
+        vbox6.addWidget(
+            QtWidgets.QLabel(text="Set Point (r):", styleSheet="color : white")
+        )
+        vbox6.addWidget(self.set_point_line_edit)
+
+        vbox7 = QtWidgets.QVBoxLayout()
+        vbox7.addWidget(
+            QtWidgets.QLabel(
+                text="Integral Time Constant (𝜏i):", styleSheet="color : white"
+            )
+        )
+        vbox7.addWidget(self.integral_line_edit)
+        vbox7.addWidget(
+            QtWidgets.QLabel(
+                text="Derivative Time Constant (𝜏d):", styleSheet="color : white"
+            )
+        )
+        vbox7.addWidget(self.derivative_line_edit)
+
+        # Second line elements.
+        hbox2 = QtWidgets.QHBoxLayout()
+        hbox2.addStretch()
+        hbox2.addLayout(vbox5)
+        hbox2.addStretch()
+        hbox2.addLayout(vbox2)
+        hbox2.addLayout(vbox3)
+        hbox2.addStretch()
+        hbox2.addLayout(vbox4)
+        hbox2.addLayout(vbox9)
+        hbox2.addStretch()
+        hbox2.addLayout(vbox6)
+        hbox2.addLayout(vbox7)
+        hbox2.addStretch()
+        hbox2.addLayout(vbox1)
+        hbox2.addStretch()
+        hbox2.addLayout(vbox8)
+        hbox2.addStretch()
+
+        # Setting of layout
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.toolbar)
+        layout.addLayout(hbox1)
+        layout.addLayout(hbox2)
+        self.metrics_label = QtWidgets.QLabel(self, styleSheet="color : white")
+        layout.addWidget(self.metrics_label)
+        layout.addWidget(self.canvas)
+        self.profile_label = QtWidgets.QLabel(self, styleSheet="color : white")
+        self.profile_label.setVisible(self.profiler.enabled)
+        self.profile_shown = float("-inf")
+        layout.addWidget(self.profile_label)
+        self.setLayout(layout)
+
+        self.update_coefficient_labels()
+        if input_path is not None:
+            self.step_box.setChecked(False)
+            self.load_input(input_path)
+        if record_dir is not None:
+            self.record_box.setChecked(True)
+
+    def set_step_magnitude(self):
+        if len(self.history.output_data) > 0:
+            self.step_magnitude_line_edit.setText(
+                f"{self.history.output_data[-1] - self.history.noise_data[-1]:.3f}"
+            )
+            self.set_time_on()
+
+    def set_auto_time_on(self):
+        if self.auto_mode.isChecked():
+            self.set_time_on()
+
+    def set_auto_time_off(self):
+        if self.auto_mode.isChecked():
+            self.set_time_off()
+
+    def set_time_on(self):
+        self.time_on = True
+
+    def set_time_off(self):
+        self.time_on = False
+        if self.file_to_input == True:
+            # self.file_data.clear()
+            self.time_on = True
+            self.file_to_input = False
+
+    def set_speed(self, text):
+        with self.worker.lock:
+            self.clock.set_speed(None if text == "Max" else float(text[:-1]))
+
+    def reset(self):
+        self.worker.reset()
+        with self.worker.lock:
+            self.simulation.noise = 0
+            self.simulation.set_disturbance(None)
+            self.simulation.set_input_profile(None)
+        if self.recorder is not None:
+            self.stop_recording()
+            self.start_recording()
+        self.history.clear()
+        self.history_index.clear()
+        self.plot.clear()
+        self.step_magnitude_line_edit.clear()
+        self.step_noise_line_edit.clear()
+        self.kc_line_edit.clear()
+        self.set_point_line_edit.clear()
+        self.derivative_line_edit.clear()
+        self.integral_line_edit.clear()
+        self.manual_mode.toggle()
+
+    def full_history_state(self):
+        """
+        Index the samples from now on and show them while Full History is
+        checked, starting from those shown, and free the index otherwise.
+        """
+        self.history_index.clear()
+        if self.full_history_box.isChecked():
+            self.history_index.extend(list(zip(*self.history.buffers)))
+            self.plot.show_history(self.history_index)
+        else:
+            self.plot.show_history(None)
+
+    def save_state(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save state", ".", "Simulation states (*.state)"
+        )
+        if path:
+            self.write_state(path)
+
+    def write_state(self, path):
+        """Save the simulation, the samples shown and the fields to `path`."""
+        with self.worker.lock:
+            samples = self.worker.take_samples()
+            snapshot = self.simulation.snapshot()
+        self.history.extend(samples)
+        if self.plot.index is not None:
+            self.history_index.extend(samples)
+        state = {
+            "simulation": snapshot,
+            "samples": list(zip(*self.history.buffers)),
+            "fields": {
+                name: edit.text() for name, edit in self.parameter_edits.items()
+            },
+            "noise_type": self.noise_type_box.currentText(),
+            "auto_mode": self.auto_mode.isChecked(),
+            "step": self.step_box.isChecked(),
+            "noise": self.noise_box.isChecked(),
+        }
+        with open(path, "wb") as output:
+            pickle.dump(state, output, pickle.HIGHEST_PROTOCOL)
+
+    def load_state(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Load state", ".", "Simulation states (*.state);;All files (*)"
+        )
+        if path:
+            self.restore_state(path)
+
+    def restore_state(self, path):
+        """Continue the simulation saved by `save_state` in `path`."""
+        try:
+            with open(path, "rb") as state_input:
+                state = pickle.load(state_input)
+        except (OSError, pickle.UnpicklingError, EOFError) as error:
+            print(error)
+            return
+        self.step_box.setChecked(state["step"])
+        self.noise_box.setChecked(state["noise"])
+        self.noise_type_box.setCurrentText(state["noise_type"])
+        (self.auto_mode if state["auto_mode"] else self.manual_mode).setChecked(True)
+        for name, text in state["fields"].items():
+            self.parameter_edits[name].setText(text)
+        self.worker.restore(state["simulation"])
+        if self.recorder is not None:
+            self.stop_recording()
+            self.start_recording()
+        self.history.clear()
+        self.history.extend(state["samples"])
+        self.history_index.clear()
+        if self.plot.index is not None:
+            self.history_index.extend(state["samples"])
+        self.plot.clear()
+        if state["samples"]:
+            self.update_labels()
+            self.plot_graphs()
+        self.time_on = True
+
+    def tune_controller(self):
+        if not self.parameters.valid(*ParameterModel.PROCESS):
+            return
+        values = self.parameters.values
+        process = [values[name] for name in ParameterModel.PROCESS]
+        self.tune_button.setDisabled(True)
+        threading.Thread(target=self.tune, args=(process,), daemon=True).start()
+
+    def tune(self, process):
+        """Tune the controller of `process` off the GUI thread, emit tuned."""
+        try:
+            result = tune_pid(*process, workers=os.cpu_count() or 1)
+        except ValueError as error:
+            print(error)
+            result = None
+        self.tuned.emit(result)
+
+    def apply_tuning(self, result):
+        self.tune_button.setEnabled(True)
+        if result is None:
+            return
+        self.kc_line_edit.setText(f"{result['kc']:.6f}")
+        self.integral_line_edit.setText(f"{result['integral_constant']:.6f}")
+        self.derivative_line_edit.setText(f"{result['derivative_constant']:.6f}")
+        self.set_auto_time_on()
+
+    def edit_return(self):
+        self.focusNextChild()
+
+    def input_button_state(self, state):
+        if state.isChecked() == True:
+            self.step_magnitude_line_edit.setEnabled(True)
+            self.file_button.setDisabled(True)
+            self.file_button.setStyleSheet("color : black;")
+            self.step_magnitude_line_edit.setStyleSheet("color : white;")
+            self.parameter_changed("magnitude", self.step_magnitude_line_edit.text())
+        else:
+            self.step_magnitude_line_edit.setDisabled(True)
+            self.file_button.setEnabled(True)
+            self.file_button.setStyleSheet("color : white;")
+            self.step_magnitude_line_edit.setStyleSheet("color : black;")
+            with self.worker.lock:
+                self.simulation.set_input_profile(None)
+
+    def noise_button_state(self, state):
+        if state.isChecked() == True:
+            self.step_noise_line_edit.setEnabled(True)
+            self.step_noise_line_edit.setStyleSheet("color : white;")
+            self.noise_type_box.setEnabled(True)
+            self.noise_type_box.setStyleSheet("color : white;")
+            self.parameter_changed("noise", self.step_noise_line_edit.text())
+        else:
+            self.step_noise_line_edit.setDisabled(True)
+            self.step_noise_line_edit.setText("")
+            with self.worker.lock:
+                self.simulation.noise = 0
+                self.simulation.set_disturbance(None)
+            self.step_noise_line_edit.setStyleSheet("color : black;")
+            self.noise_type_box.setDisabled(True)
+            self.noise_type_box.setStyleSheet("color : black;")
+            self.set_time_on()
+
+    def record_button_state(self, state):
+        if state.isChecked() == True:
+            self.start_recording()
+        else:
+            self.stop_recording()
+
+    def start_recording(self):
+        self.recorder = RunRecorder(
+            new_run_directory(self.record_dir),
+            ProcessSimulation.COLUMNS,
+            fmt=self.record_format,
+        )
+        with self.worker.lock:
+            self.simulation.sink = self.recorder
+
+    def stop_recording(self):
+        with self.worker.lock:
+            self.simulation.sink = None
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            try:
+                recorder.close()
+            except OSError as error:
+                print(error)
+
+    def set_auto_mode(self, checked):
+        with self.worker.lock:
+            self.simulation.auto_mode = checked
+        self.parameter_changed("set_point", self.set_point_line_edit.text())
+
+    def parameter_changed(self, name, text):
+        """Validate an edited parameter and apply it to the simulation."""
+        parameters = self.parameters
+        changed = parameters.set(name, text)
+        if name in parameters.invalid:
+            return
+        with self.worker.lock:
+            self.apply_parameter(name)
+        if changed and name in ParameterModel.PROCESS + ParameterModel.CONTROLLER:
+            self.update_coefficient_labels()
+
+    def apply_parameter(self, name):
+        parameters = self.parameters
+        simulation = self.simulation
+        value = parameters.values[name]
+        if name in ParameterModel.PROCESS:
+            try:
+                parameters.apply_process(simulation.process)
+            except ValueError as error:
+                print(error)
+                parameters.reject(ParameterModel.PROCESS)
+                return
+            parameters.accept(ParameterModel.PROCESS)
+            self.clock.set_period(parameters.values["period"])
+        if name == "period" or name in ParameterModel.CONTROLLER:
+            if parameters.valid(*ParameterModel.CONTROLLER):
+                parameters.apply_controller(simulation.controller)
+        if name == "set_point" and self.auto_mode.isChecked():
+            simulation.set_point = value
+        elif name == "magnitude" and self.step_box.isChecked():
+            simulation.magnitude = value if value != 0.0 else 0.0000000000001
+        elif name == "noise" and self.noise_box.isChecked():
+            self.apply_noise(value)
+
+    def apply_noise(self, magnitude):
+        """Apply a noise step, or seeded noise of standard deviation `magnitude`."""
+        simulation = self.simulation
+        kind = self.noise_type_box.currentText()
+        if kind == "Step":
+            simulation.set_disturbance(None)
+            simulation.noise = magnitude
+            return
+        simulation.noise = 0
+        simulation.set_disturbance(
+            create_disturbance(kind.lower().replace(" ", "_"), magnitude, self.seed)
+        )
+
+    def update_figure(self):
+        profiler = self.profiler
+        profiler.tick()
+        with profiler.stage("frame"):
+            if self.worker.error is not None:
+                print(self.worker.error)
+                self.worker.error = None
+                self.time_on = False
+            with profiler.stage("ready"):
+                self.worker.running = self.time_on and self.ready()
+            with profiler.stage("take_samples"):
+                samples = self.worker.take_samples()
+            if samples:
+                with profiler.stage("history"):
+                    self.history.extend(samples)
+                    if self.plot.index is not None:
+                        self.history_index.extend(samples)
+                with profiler.stage("labels"):
+                    self.update_labels()
+                with profiler.stage("plot"):
+                    self.plot_graphs()
+        if profiler.enabled and profiler.last_tick - self.profile_shown >= 1.0:
+            self.profile_shown = profiler.last_tick
+            self.profile_label.setText(
+                f"{profiler.status()}  dropped samples {self.clock.dropped}"
+            )
+
+    def ready(self):
+        """Return True if the parameters needed by the selected input are valid."""
+        parameters = self.parameters
+        simulation = self.simulation
+        if not parameters.valid(*ParameterModel.PROCESS):
+            return False
+        if self.noise_box.isChecked() and not parameters.valid("noise"):
+            return False
+        if self.auto_mode.isChecked():
+            return parameters.valid(*ParameterModel.CONTROLLER, "set_point")
+        if self.step_box.isChecked():
+            return parameters.valid("magnitude")
+        if simulation.profile_exhausted:
+            self.file_to_input = True
+            self.step_magnitude_line_edit.setText(f"{simulation.magnitude:.3f}")
+            self.step_box.setChecked(True)
+            return parameters.valid("magnitude")
+        return simulation.input_source is not None
+
+    def update_coefficient_labels(self):
+        coefficients = self.parameters.coefficients
+        self.a1_label.setText(f"a1 = {coefficients.a1:.3f}")
+        self.b1_label.setText(f"b1 = {coefficients.b1:.3f}")
+        self.b2_label.setText(f"b2 = {coefficients.b2:.3f}")
+        self.n_value_label.setText(f"N = {coefficients.n_value}")
+        self.q0_label.setText(f"q0 = {coefficients.q0:.3f}")
+        self.q1_label.setText(f"q1 = {coefficients.q1:.3f}")
+        self.q2_label.setText(f"q2 = {coefficients.q2:.3f}")
+
+    def update_labels(self):
+        sample = self.history.last()
+        self.mk_label.setText(f"m(k) = {sample['input']:.3f}")
+        self.ck_label.setText(f"c(k) = {sample['output']:.3f}")
+        self.error_label.setText(
+            f"error = {sample['set_point'] - sample['output']:.3f}"
+        )
+        if self.manual_mode.isChecked():
+            self.set_point_line_edit.setText(f"{sample['set_point']:.3f}")
+            self.metrics_label.clear()
+            return
+        with self.worker.lock:
+            metrics = self.simulation.performance()
+        self.metrics_label.setText(
+            f"IAE = {metrics['iae']:.3f}    ISE = {metrics['ise']:.3f}"
+            f"    ITAE = {metrics['itae']:.3f}    rise time = {metrics['rise_time']:.2f}"
+            f"    overshoot = {metrics['overshoot']:.1f}%"
+            f"    settling time = {metrics['settling_time']:.2f}"
+            f"    var m(k) = {metrics['manipulation_variance']:.4f}"
+        )
+
+    def getfile(self):
+        fname = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Open file",
+            ".",
+            "Input files (*.txt *.npy *.bin run.json);;Text files (*.txt);;All files (*)",
+        )
+        path = fname[0]
+        if os.path.basename(path) == "run.json":
+            path = os.path.dirname(path)
+        self.load_input(path)
+
+    def load_input(self, path):
+        try:
+            source = open_input_source(path)
+        except (FileNotFoundError, ValueError) as error:
+            print(error)
+            return
+        with self.worker.lock:
+            self.simulation.set_input_profile(source)
+        self.time_on = True
+
+    def plot_graphs(self):
+        self.plot.update(self.history)
+
+    def closeEvent(self, event):
+        self.worker.stop()
+        self.stop_recording()
+        if self.profile_output is not None:
+            self.profiler.export(self.profile_output)
+            self.profile_output = None
+        super(Window, self).closeEvent(event)
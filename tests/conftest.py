@@ -0,0 +1,9 @@
+"""
+conftest.py
+Makes the simulator modules importable from the tests.
+Version: 1.0.2
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
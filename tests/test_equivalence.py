@@ -0,0 +1,125 @@
+"""
+test_equivalence.py
+The served plant, batch, fleet and compiled simulations against ProcessSimulation.
+Version: 1.0.2
+"""
+import asyncio
+import threading
+import numpy as np
+import pytest
+from batch_simulation import simulate_open_loop
+from closed_loop_kernel import simulate_closed_loop
+from fleet_engine import ProcessFleet
+from plant_client import PlantClient, run_controller
+from plant_server import PlantServer
+from process_engine import FirstOrderProcess, PIDController, ProcessSimulation
+
+PROCESSES = [
+    dict(gain=1.0, tau=3.34, theta_prime=1.46, period=1.0),
+    dict(gain=2.5, tau=10.0, theta_prime=7.3, period=0.5),
+    dict(gain=0.4, tau=1.2, theta_prime=0.3, period=0.1),
+]
+
+
+def closed_loop(steps, process=None, set_point=1.0):
+    """Return the outputs of a ProcessSimulation in auto mode from rest."""
+    simulation = ProcessSimulation(
+        FirstOrderProcess(**(process or dict())), history_size=1
+    )
+    simulation.auto_mode = True
+    simulation.set_point = set_point
+    return simulation.run(steps)
+
+
+@pytest.fixture
+def address():
+    loop = asyncio.new_event_loop()
+    server = PlantServer(speed="max")
+    address = loop.run_until_complete(server.start_tcp())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield tuple(address)
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.mark.parametrize("process", PROCESSES)
+def test_served_plant_matches_auto_mode(address, process):
+    with PlantClient(address) as client:
+        client.open(**process)
+        controller = PIDController(period=client.period)
+        outputs = run_controller(client, controller, 1.0, 300)
+    assert outputs == closed_loop(300, process)
+
+
+def test_served_plant_rejects_bad_speed(address):
+    with PlantClient(address) as client:
+        for speed in (0, -1.0, "fast", float("inf")):
+            with pytest.raises(ValueError):
+                client.open(speed=speed)
+        client.open(gain=1e300)
+        assert client.step([1e300] * 4)[-1] is None
+
+
+@pytest.mark.parametrize("process", PROCESSES)
+def test_open_loop_matches_step(process):
+    inputs = np.random.default_rng(0).normal(size=500)
+    system, _ = simulate_open_loop(inputs, FirstOrderProcess(**process))
+    plant = FirstOrderProcess(**process)
+    stepped = [plant.step(value) for value in inputs]
+    np.testing.assert_allclose(system, stepped, rtol=1e-12, atol=1e-12)
+
+
+def test_fleet_matches_simulations():
+    gain, tau, theta_prime, period = (
+        [process[name] for process in PROCESSES]
+        for name in ("gain", "tau", "theta_prime", "period")
+    )
+    set_point = [1.0, -0.5, 2.0]
+    fleet = ProcessFleet(3, gain, tau, theta_prime, period, delay_depth=4)
+    fleet.set_controller_parameters(1.957983, 4.564447, 0.476814)
+    fleet.auto_mode[:] = True
+    fleet.set_point[:] = set_point
+    outputs = fleet.run(300)
+    for loop, process in enumerate(PROCESSES):
+        expected = closed_loop(300, process, set_point[loop])
+        np.testing.assert_array_equal(outputs[:, loop], expected)
+
+
+def test_fleet_branches_from_simulation():
+    simulation = ProcessSimulation(history_size=1)
+    simulation.auto_mode = True
+    simulation.set_point = 1.0
+    simulation.run(100)
+    fleet = ProcessFleet.from_simulation(simulation, 2)
+    branched = fleet.run(100)
+    expected = simulation.run(100)
+    np.testing.assert_array_equal(branched[:, 0], expected)
+    np.testing.assert_array_equal(branched[:, 1], expected)
+
+
+@pytest.mark.parametrize("process", PROCESSES)
+def test_kernel_matches_simulation(process):
+    _, _, output, _ = simulate_closed_loop(
+        300, FirstOrderProcess(**process), set_point=1.0
+    )
+    np.testing.assert_array_equal(output, closed_loop(300, process))
+
+
+def test_kernel_follows_schedule():
+    auto = np.arange(300) >= 50
+    set_point = np.where(np.arange(300) < 150, 1.0, -1.0)
+    _, _, output, _ = simulate_closed_loop(
+        300, set_point=set_point, auto=auto, magnitude=0.5
+    )
+    simulation = ProcessSimulation(history_size=1)
+    simulation.magnitude = 0.5
+    expected = list()
+    for t in range(300):
+        simulation.auto_mode = bool(auto[t])
+        if auto[t]:
+            simulation.set_point = float(set_point[t])
+        expected.append(simulation.step())
+    np.testing.assert_array_equal(output, expected)
@@ -0,0 +1,164 @@
+"""
+tick_profiler.py
+Latency histograms of the stages of every frame and late or missed ticks.
+Version: 1.0.2
+"""
+import json
+import time
+import threading
+
+BUCKETS = 24
+
+
+class StageTimer:
+    """
+    Context manager adding the time spent in it to a histogram with buckets
+    of powers of two microseconds, bucket i holding times below 2 ** i us.
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.add(time.perf_counter() - self.start)
+
+    def add(self, seconds):
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction):
+        """Return the upper bound in seconds of the bucket holding `fraction`."""
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(2**bucket * 1e-6, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.maximum * 1000,
+            "histogram_us": {
+                f"<{2**bucket}": count
+                for bucket, count in enumerate(self.counts)
+                if count
+            },
+        }
+
+
+class TickProfiler:
+    """
+    Timing of named stages of a periodic tick and of the ticks themselves.
+
+    `tick` is called at the start of every timer tick due every `interval`
+    seconds. A tick more than `tolerance` intervals after its deadline is
+    late, and every whole interval without a tick counts as a missed one.
+    Stages may be timed from other threads, such as the simulation worker.
+    """
+
+    enabled = True
+
+    def __init__(self, interval, tolerance=0.2):
+        self.interval = interval
+        self.tolerance = tolerance
+        self.lock = threading.Lock()
+        self.stages = dict()
+        self.ticks = 0
+        self.late = 0
+        self.missed = 0
+        self.last_tick = None
+
+    def stage(self, name):
+        """Return the timer of the stage `name`, to be used in a with block."""
+        timer = self.stages.get(name)
+        if timer is None:
+            with self.lock:
+                timer = self.stages.setdefault(name, StageTimer())
+        return timer
+
+    def stage_items(self):
+        """Return the (name, timer) pairs of the stages timed so far."""
+        with self.lock:
+            return list(self.stages.items())
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            elapsed = now - self.last_tick
+            if elapsed > self.interval * (1 + self.tolerance):
+                self.late += 1
+                self.missed += int(elapsed / self.interval) - 1
+        self.last_tick = now
+        self.ticks += 1
+
+    def reset(self):
+        with self.lock:
+            self.stages = dict()
+        self.ticks = 0
+        self.late = 0
+        self.missed = 0
+        self.last_tick = None
+
+    def summary(self):
+        return {
+            "interval_ms": self.interval * 1000,
+            "ticks": self.ticks,
+            "late": self.late,
+            "missed": self.missed,
+            "stages": {name: timer.summary() for name, timer in self.stage_items()},
+        }
+
+    def status(self):
+        """Return a one line summary of the mean and p95 time of every stage."""
+        stages = "  ".join(
+            f"{name} {timer.total / timer.count * 1000:.2f}"
+            f"/{timer.percentile(0.95) * 1000:.2f} ms"
+            for name, timer in self.stage_items()
+            if timer.count
+        )
+        return f"{stages}  ticks {self.ticks}  late {self.late}  missed {self.missed}"
+
+    def export(self, path):
+        with open(path, "w") as output:
+            json.dump(self.summary(), output, indent=2)
+
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class NullProfiler:
+    """Profiler doing nothing, used when the instrumentation is disabled."""
+
+    enabled = False
+    null_stage = NullStage()
+
+    def stage(self, name):
+        return self.null_stage
+
+    def tick(self):
+        pass
+
+    def reset(self):
+        pass